@@ -1,17 +1,35 @@
 import time
 import pygame
 import sys
-import os
 import math
-import random
 import webbrowser
-from pathlib import Path
+
+from assets import AssetManager
+from audio import AudioManager, Cue
+from scenario import Scenario
+from simulation import PIXELS_PER_NM
+from profiler import FrameProfiler
+from rendering import (DirtyRects, MessageLog, SpriteAtlas, airport_layers, build_profiler_overlay, draw_aircraft,
+                       fonts, radar_layers, render_text)
 
 # Window and font
 WINDOW_SIZE = (1280, 832)
 FONT_NAME = "arial"
 FONT_SIZE_TITLE = 36
 FONT_SIZE_BUTTON = 28
+FONT_SIZE_LABEL = 18
+FONT_SIZE_CHAT = 22
+# Every chat message of the current session, newest last
+MESSAGE_HISTORY_PATH = "message_history.log"
+# Seed, settings and inputs of the last session, replayable with --replay
+LAST_SCENARIO_PATH = "last_scenario.json"
+# Set by --replay FILE: the radar scene replays this instead of starting a new session
+REPLAY_SCENARIO = None
+# F3 shows the frame-time profiler, F4 starts/stops writing every frame's timings here
+PROFILE_CSV_PATH = "frame_times.csv"
+PROFILER_REFRESH = 0.25  # seconds between overlay redraws
+# Static scenes redraw at least this often even without input (ms)
+IDLE_REDRAW_MS = 1000
 
 pygame.init()
 try:
@@ -24,15 +42,54 @@ screen = pygame.display.set_mode(WINDOW_SIZE)
 pygame.display.set_caption("Air Traffic Controller Simulator")
 clock = pygame.time.Clock()
 
-font_title = pygame.font.SysFont(FONT_NAME, FONT_SIZE_TITLE)
-font_button = pygame.font.SysFont(FONT_NAME, FONT_SIZE_BUTTON)
+# Every font any scene uses, resolved once here so no frame ever looks one up
+fonts.preload([
+    (FONT_NAME, FONT_SIZE_TITLE, False),
+    (FONT_NAME, FONT_SIZE_BUTTON, False),
+    (FONT_NAME, FONT_SIZE_LABEL, False),
+    (FONT_NAME, FONT_SIZE_CHAT, False),
+    (FONT_NAME, 16, True),   # time-scale readout
+    (FONT_NAME, 24, False),  # help icon
+    (FONT_NAME, 22, True),   # runway labels in the airport layer
+])
+font_title = fonts.get(FONT_NAME, FONT_SIZE_TITLE)
+font_button = fonts.get(FONT_NAME, FONT_SIZE_BUTTON)
+font_label = fonts.get(FONT_NAME, FONT_SIZE_LABEL)
+font_chat = fonts.get(FONT_NAME, FONT_SIZE_CHAT)
+font_speed = fonts.get(FONT_NAME, 16, bold=True)
+font_help = fonts.get(FONT_NAME, 24)
+
+# Sounds and documents are not needed for the first frame, so they load on a
+# background thread while the menu is already up; each entry lists candidate files
+SOUND_FILES = {
+    "button": ("Soundeffect.wav", "Soundeffect.ogg", "Soundeffect.mp3", "Soundeffect"),
+    "conflict": ("conflict.wav", "conflict.ogg", "conflict.mp3", "conflict"),
+    "alert": ("alert.wav", "alert.ogg", "alert.mp3", "alert"),
+}
+DOCUMENT_FILES = {
+    "runway_09l": ("Runway09L.pdf",),
+    "ground_map": ("Groundmap.pdf",),
+}
+
+# Reserved channels and limits per sound: clicks may overlap, the conflict
+# tone never stacks, and the alert sounds at most every 3 seconds
+AUDIO_CUES = {
+    "button": Cue(channels=2, min_interval=0.05, overlap=True),
+    "conflict": Cue(channels=1),
+    "alert": Cue(channels=1, min_interval=3.0),
+}
+
+assets = AssetManager(audio=_mixer_ready)
+assets.preload_sounds(SOUND_FILES)
+assets.preload_files(DOCUMENT_FILES)
+audio = AudioManager(AUDIO_CUES, assets.sound, enabled=_mixer_ready)
 
-# Load background image 
-background_menu = pygame.image.load("background.png")
-background_menu = pygame.transform.scale(background_menu, WINDOW_SIZE)
+# Background image, decoded and scaled once and shared by every scene
+background_menu = background_generic = assets.image("background.png", WINDOW_SIZE)
 
-background_generic = pygame.image.load("background.png")
-background_generic = pygame.transform.scale(background_generic, WINDOW_SIZE)
+AIRCRAFT_IMAGE = assets.image(("aircraft.png", "Aircraft.png", "plane.png"), alpha=True)
+# Pre-rotated copies of the aircraft sprite, built as headings and zooms are seen
+aircraft_atlas = SpriteAtlas(AIRCRAFT_IMAGE) if AIRCRAFT_IMAGE else None
 
 
 # --- Simulation Scene ---
@@ -42,9 +99,6 @@ def simulation_screen():
     # State variables for pause, command input
     paused = False
     command_text = ""
-    game_over = False
-    last_alert_time = 0
-    alert_cooldown = 3.0  # seconds between alert sounds
     # --- Time scale for simulation speed ---
     time_scale = 1.0
     # For text input cursor blink (optional, not required)
@@ -53,10 +107,10 @@ def simulation_screen():
     cursor_interval = 0.5
 
     # --- Message log state ---
-    messages = []  # list of (sender, text, timestamp)
+    messages = MessageLog(font_chat, history_path=MESSAGE_HISTORY_PATH)
     # Helper: append a message to the log
     def append_message(sender, text):
-        messages.append((sender, text, time.time()))
+        messages.append(sender, text)
 
     def resume_game():
         nonlocal paused
@@ -73,489 +127,56 @@ def simulation_screen():
     ZOOM_STEP = 0.1
 
     base_radar_radius = (min(WINDOW_SIZE[0], WINDOW_SIZE[1]) / 2 - 60) * 0.75
-    # Approximate physical scale: 5000 m runway spans ~300 px on screen
-    METERS_PER_PIXEL = 5000 / 300
-    PIXELS_PER_METER = 1 / METERS_PER_PIXEL
-    PIXELS_PER_SECOND_PER_KNOT = 0.514444 * PIXELS_PER_METER
-    PIXELS_PER_NM = 1852 * PIXELS_PER_METER
 
-    aircrafts = []
-    selected_aircraft = None
-    spawn_timer = 0.0
-    difficulty = SETTINGS.get("difficulty", "Normal")
-    if difficulty == "Beginner":
-        next_spawn_time = random.uniform(28.0, 36.0)
-    elif difficulty == "Easy":
-        next_spawn_time = random.uniform(14.0, 20.0)
-    elif difficulty == "Normal":
-        next_spawn_time = random.uniform(9.0, 16.0)
-    elif difficulty == "Realistic":
-        next_spawn_time = random.uniform(5.0, 10.0)
+    # The headless engine owns all aircraft, spawning, commands and conflicts;
+    # this scene only draws it and feeds it input.
+    pick_radius = max(AIRCRAFT_IMAGE.get_width(), AIRCRAFT_IMAGE.get_height()) / 2 + 8 if AIRCRAFT_IMAGE else 20
+    # Every session is seeded and recorded so it can be replayed exactly
+    replaying = REPLAY_SCENARIO is not None
+    if replaying:
+        scenario = REPLAY_SCENARIO
+        sim = scenario.replay_simulation(on_message=append_message)
     else:
-        next_spawn_time = random.uniform(9.0, 16.0)
-    approach_target = pygame.Vector2(WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] // 2 - 20)
+        scenario = Scenario.new(SETTINGS, window_size=WINDOW_SIZE, pick_radius=pick_radius)
+        sim = scenario.record(on_message=append_message)
+    sim.zoom = zoom
+    selected_aircraft = None
 
     screen_center = pygame.Vector2(WINDOW_SIZE[0] / 2, WINDOW_SIZE[1] / 2)
 
-    def screen_to_world(point):
-        vec = pygame.Vector2(point)
-        return screen_center + (vec - screen_center) / max(zoom, 0.001)
-
-    max_view_factor = 1.0 / ZOOM_MIN
-    world_margin = 200
-    world_left_limit = screen_center.x - screen_center.x * max_view_factor
-    world_right_limit = screen_center.x + (WINDOW_SIZE[0] - screen_center.x) * max_view_factor
-    world_top_limit = screen_center.y - screen_center.y * max_view_factor
-    world_bottom_limit = screen_center.y + (WINDOW_SIZE[1] - screen_center.y) * max_view_factor
-    world_bounds = pygame.Rect(
-        world_left_limit - world_margin,
-        world_top_limit - world_margin,
-        (world_right_limit - world_left_limit) + 2 * world_margin,
-        (world_bottom_limit - world_top_limit) + 2 * world_margin,
-    )
-
-    aircraft_label_font = pygame.font.SysFont(FONT_NAME, 18)
-    airline_codes = ["BA", "QR", "LH", "EK", "AF", "DL", "VS", "QF", "KL", "TK"]
-    aircraft_types = ["A320-251NX", "B777-300ER", "A380-800", "B787-8", "A350-900", "A321-200", "A330-800", "A220-200"]
-
-    class Aircraft:
-        def __init__(self, position, target, callsign, aircraft_type, speed_knots, altitude_ft):
-            self.pos = pygame.Vector2(position)
-            self.target = pygame.Vector2(target)
-            self.callsign = callsign
-            self.aircraft_type = aircraft_type
-            self.speed_knots = float(speed_knots)
-            self.altitude_ft = float(altitude_ft)
-            self.selected = False
-            self.speed_px = self.speed_knots * PIXELS_PER_SECOND_PER_KNOT
-            direction_vec = (self.target - self.pos)
-            if direction_vec.length_squared() == 0:
-                direction_vec = pygame.Vector2(0, 1)
-            else:
-                direction_vec = direction_vec.normalize()
-            self.direction = direction_vec
-            self.heading_deg = (math.degrees(math.atan2(self.direction.x, -self.direction.y)) + 360) % 360
-
-            self.target_heading = self.heading_deg
-            self.target_speed = self.speed_knots
-            self.target_altitude = self.altitude_ft
-            self.turn_rate_deg = 2.5  # deg per second
-            self.accel_knots_per_s = 3.0
-            self.climb_rate_fps = 1500 / 60.0  # feet per second (~1500 fpm)
-
-            base_radius = max(AIRCRAFT_IMAGE.get_width(), AIRCRAFT_IMAGE.get_height()) / 2 + 8 if AIRCRAFT_IMAGE else 20
-            self.base_pick_radius = base_radius
-            self.distance_to_target = (self.target - self.pos).length()
-            self.range_nm = self.distance_to_target / PIXELS_PER_NM
-            self.conflict = False
-
-        def update(self, dt, target):
-            # Adjust heading gradually
-            heading_diff = (self.target_heading - self.heading_deg + 540) % 360 - 180
-            max_turn = self.turn_rate_deg * dt
-            if abs(heading_diff) > max_turn:
-                self.heading_deg = (self.heading_deg + max_turn * (1 if heading_diff > 0 else -1)) % 360
-            else:
-                self.heading_deg = self.target_heading % 360
-
-            rad = math.radians(self.heading_deg)
-            self.direction = pygame.Vector2(math.sin(rad), -math.cos(rad))
-
-            # Adjust speed gradually
-            speed_diff = self.target_speed - self.speed_knots
-            max_speed_change = self.accel_knots_per_s * dt
-            if abs(speed_diff) > max_speed_change:
-                self.speed_knots += max_speed_change * (1 if speed_diff > 0 else -1)
-            else:
-                self.speed_knots = self.target_speed
-            self.speed_px = self.speed_knots * PIXELS_PER_SECOND_PER_KNOT
-
-            # Adjust altitude gradually
-            alt_diff = self.target_altitude - self.altitude_ft
-            max_alt_change = self.climb_rate_fps * dt
-            if abs(alt_diff) > max_alt_change:
-                self.altitude_ft += max_alt_change * (1 if alt_diff > 0 else -1)
-            else:
-                self.altitude_ft = self.target_altitude
-
-            self.pos += self.direction * self.speed_px * dt
-            to_target = target - self.pos
-            self.distance_to_target = to_target.length()
-            self.range_nm = self.distance_to_target / PIXELS_PER_NM
-            return None
-
-        def apply_command(self, heading=None, speed=None, altitude=None):
-            if heading is not None:
-                self.target_heading = heading % 360
-            if speed is not None:
-                self.target_speed = float(speed)
-            if altitude is not None:
-                self.target_altitude = float(altitude)
-
-        def draw(self, surface, zoom_level, transform_point):
-            screen_vec = transform_point(self.pos)
-            pos = (int(screen_vec.x), int(screen_vec.y))
-            halo_radius = max(10, int(self.base_pick_radius * zoom_level * 1.1))
-            if self.conflict:
-                halo_color = (255, 60, 60)
-            elif self.selected:
-                halo_color = (255, 210, 40)
-            else:
-                halo_color = (60, 160, 245)
-            halo_alpha = 110 if not self.selected else 180
-            halo = pygame.Surface((halo_radius * 2, halo_radius * 2), pygame.SRCALPHA)
-            pygame.draw.circle(halo, (*halo_color, halo_alpha), (halo_radius, halo_radius), halo_radius)
-            surface.blit(halo, (pos[0] - halo_radius, pos[1] - halo_radius))
-
-            image_scale = max(0.3, min(1.5, zoom_level * 0.85))
-            if AIRCRAFT_IMAGE:
-                aircraft_sprite = pygame.transform.rotozoom(AIRCRAFT_IMAGE, self.heading_deg - 90, image_scale)
-                sprite_rect = aircraft_sprite.get_rect(center=pos)
-                surface.blit(aircraft_sprite, sprite_rect)
-            else:
-                marker_radius = max(6, int(12 * zoom_level))
-                color = (255, 215, 0) if self.selected else (200, 220, 255)
-                pygame.draw.circle(surface, color, pos, marker_radius)
-                pygame.draw.circle(surface, (255, 255, 255), pos, marker_radius, 2)
-
-            label = aircraft_label_font.render(self.callsign, True, (255, 255, 255))
-            label_rect = label.get_rect(midtop=(pos[0], pos[1] + int(14 * zoom_level)))
-            surface.blit(label, label_rect)
-
-        def contains_point(self, point, zoom_level, transform_point):
-            screen_vec = transform_point(self.pos)
-            radius = self.base_pick_radius * zoom_level
-            dx = point[0] - screen_vec.x
-            dy = point[1] - screen_vec.y
-            return dx * dx + dy * dy <= radius * radius
-
-        def info_lines(self):
-            return [
-                f"Callsign: {self.callsign}",
-                f"Type: {self.aircraft_type}",
-                f"Speed: {int(self.speed_knots)} kts",
-                f"Altitude: {int(self.altitude_ft)} ft",
-                f"Heading: {int(self.heading_deg)}° | Range: {self.range_nm:.1f} NM",
-            ]
-
-    def generate_callsign():
-        return f"{random.choice(airline_codes)}{random.randint(100, 999)}"
-
-    def spawn_aircraft():
-        nonlocal spawn_timer, next_spawn_time
-        if game_over:
-            return
-        edge_name = random.choice(["left", "right", "top", "bottom"])
-        if edge_name == "left":
-            spawn_pos = screen_to_world((0.0, random.uniform(0.0, WINDOW_SIZE[1])))
-        elif edge_name == "right":
-            spawn_pos = screen_to_world((float(WINDOW_SIZE[0]), random.uniform(0.0, WINDOW_SIZE[1])))
-        elif edge_name == "top":
-            spawn_pos = screen_to_world((random.uniform(0.0, WINDOW_SIZE[0]), 0.0))
-        else:
-            spawn_pos = screen_to_world((random.uniform(0.0, WINDOW_SIZE[0]), float(WINDOW_SIZE[1])))
-        callsign = generate_callsign()
-        ac_type = random.choice(aircraft_types)
-        speed = random.randint(160, 230)
-        altitude = random.randint(4200, 9500)
-        aircraft = Aircraft(spawn_pos, approach_target, callsign, ac_type, speed, altitude)
-        aircrafts.append(aircraft)
-        range_nm = ((pygame.Vector2(spawn_pos) - approach_target).length()) / PIXELS_PER_NM
-        append_message(
-            callsign,
-            f"{callsign} {ac_type} inbound {edge_name}, {speed} kts, {altitude} ft, {range_nm:.1f} NM",
-        )
-        spawn_timer = 0.0
-        difficulty = SETTINGS.get("difficulty", "Normal")
-        if difficulty == "Beginner":
-            next_spawn_time = random.uniform(28.0, 36.0)
-        elif difficulty == "Easy":
-            next_spawn_time = random.uniform(14.0, 20.0)
-        elif difficulty == "Normal":
-            next_spawn_time = random.uniform(9.0, 16.0)
-        elif difficulty == "Realistic":
-            next_spawn_time = random.uniform(5.0, 10.0)
-        else:
-            next_spawn_time = random.uniform(9.0, 16.0)
-
-    def find_aircraft(callsign: str):
-        callsign_upper = callsign.upper()
-        for ac in aircrafts:
-            if ac.callsign.upper() == callsign_upper:
-                return ac
-        return None
-
-    # --- Runway entry points and headings ---
-    runway_entry_points = {}
-    runway_headings = {}
-
-    # Helper: check landing clearance
-    def check_landing_clearance(ac, entry_point, runway_heading):
-        if (ac.pos - entry_point).length() > 10:
-            return False, "Not at entry point"
-        diff = (ac.heading_deg - runway_heading + 540) % 360 - 180
-        if abs(diff) > 20:
-            return False, "Not aligned with runway"
-        if not (2000 <= ac.altitude_ft <= 3000):
-            return False, "Not at landing altitude (FL20–30)"
-        return True, "Clear to land"
-
-    def process_command(command: str):
-        tokens = command.strip().split()
-        if len(tokens) < 4:
-            append_message("Tower", "Message not transmitted, please try again.")
-            return
-
-        callsign = tokens[0]
-        aircraft = find_aircraft(callsign)
-        if not aircraft:
-            append_message("Tower", f"Unknown aircraft {callsign}.")
-            return
-
-
-        # -- Landing clearance handling --
-        if len(tokens) >= 5 and tokens[1].upper() == "CLEARED" and tokens[2].upper() == "TO" and tokens[3].upper() == "LAND":
-            rw_label = tokens[4].upper().replace("RWY", "")
-            if rw_label not in runway_entry_points:
-                append_message("Tower", f"Runway {rw_label} not available")
-                return
-            entry_point = runway_entry_points[rw_label]
-            runway_heading = runway_headings.get(rw_label)
-            if not runway_heading:
-                append_message("Tower", f"No heading info for {rw_label}")
-                return
-            ok, reason = check_landing_clearance(aircraft, entry_point, runway_heading)
-            if ok:
-                append_message(aircraft.callsign, f"{aircraft.callsign} landing clearance acknowledged runway {rw_label}")
-                if aircraft in aircrafts:
-                    aircrafts.remove(aircraft)
-                    append_message(aircraft.callsign, f"{aircraft.callsign} landed successfully.")
-            else:
-                append_message("Tower", f"Landing clearance denied: {reason}")
-            return
-
-        heading = speed = altitude = None
-        errors = []
-        for tok in tokens[1:]:
-            t = tok.upper()
-            if t.startswith("HDG") and len(t) > 3:
-                try:
-                    heading_val = int(t[3:]) % 360
-                    heading = heading_val
-                except ValueError:
-                    errors.append("Invalid heading")
-            elif t.startswith("SPD") and len(t) > 3:
-                try:
-                    speed_val = max(40, min(400, int(t[3:])))
-                    speed = speed_val
-                except ValueError:
-                    errors.append("Invalid speed")
-            elif t.startswith("FL") and len(t) > 2:
-                try:
-                    altitude_val = int(t[2:]) * 100
-                    altitude = altitude_val
-                except ValueError:
-                    errors.append("Invalid altitude")
-            else:
-                errors.append(f"Unknown token {tok}")
-
-        if heading is None or speed is None or altitude is None:
-            if not errors:
-                errors.append("Missing HDG, SPD, or FL")
+    aircraft_label_font = font_label
 
-        if errors:
-            append_message("Tower", "; ".join(errors))
-            return
-
-        aircraft.apply_command(heading=heading, speed=speed, altitude=altitude)
-        append_message(
-            aircraft.callsign,
-            f"Turning HDG {heading:03d}, speed {speed} kts, altitude {altitude} ft",
-        )
+    # Only regions that change are pushed to the window; anything that moves
+    # the whole view (zoom, overlays) forces a full flip instead
+    screen_updates = DirtyRects(WINDOW_SIZE)
+    drawn_view = None
+    drawn_top_bar = None
+    drawn_input = None
 
-    # Font for chat log/messages
-    chat_font = pygame.font.SysFont(FONT_NAME, 22)
-    nonlocal_last_alert_time = [0]  # wrap in list to allow mutation
+    # Per-phase frame timings; the engine charges its own update and conflict time
+    profiler = FrameProfiler()
+    show_profiler = False
+    profiler_overlay = None
+    profiler_built = 0.0
     while current_scene == "start":
+        profiler.begin_frame()
+        sim.phase_times = profiler.current
+        if replaying:
+            # The recording decides the zoom
+            zoom = sim.zoom
+        # Scaled wall time since the last frame; the engine turns it into fixed steps
         dt = (clock.get_time() / 1000.0) * time_scale
-        # Fill background (dark blue)
-        screen.fill((0, 44, 66))
-
-        # Radar circles (concentric)
-        center = (WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] // 2)
-        approach_target.update((screen_center.x, screen_center.y - 20))
-        max_radius = max(40, int(base_radar_radius * zoom))
-        circle_color = (40, 60, 80)
-        circle_alpha = 150
-        num_circles = 5
-        center_vec = pygame.Vector2(center)
+        # Background and radar circles, prebuilt once per zoom step
+        screen.blit(radar_layers.get(zoom, WINDOW_SIZE, base_radar_radius), (0, 0))
 
         def transform_point(world_point):
             vec = pygame.Vector2(world_point)
             return screen_center + (vec - screen_center) * zoom
 
-        # Draw with alpha
-        radar_surface = pygame.Surface(WINDOW_SIZE, pygame.SRCALPHA)
-        for i in range(1, num_circles + 1):
-            radius = max_radius * i // num_circles
-            pygame.draw.circle(radar_surface, (*circle_color, circle_alpha), center, radius, 2)
-        # Draw crosshairs
-        pygame.draw.line(radar_surface, (*circle_color, circle_alpha), (center[0], 60), (center[0], WINDOW_SIZE[1]-60), 1)
-        pygame.draw.line(radar_surface, (*circle_color, circle_alpha), (60, center[1]), (WINDOW_SIZE[0]-60, center[1]), 1)
-        screen.blit(radar_surface, (0, 0))
-
-        # --- Draw runways ---
-        def draw_runway(surface, center_point, length, width, heading_deg, label1, label2, color=(180, 180, 180)):
-            """Draws a runway aligned with a true heading: 0° points north (up)."""
-            rotation = 90 - heading_deg
-
-            base_surface = pygame.Surface((length, width), pygame.SRCALPHA)
-            pygame.draw.rect(base_surface, color, (0, 0, length, width))
-            pygame.draw.rect(base_surface, (255, 255, 255), (0, 0, length, width), 2)
-            runway_sprite = pygame.transform.rotozoom(base_surface, rotation, zoom)
-            center_screen = transform_point(center_point)
-            rect = runway_sprite.get_rect(center=(int(center_screen.x), int(center_screen.y)))
-            surface.blit(runway_sprite, rect.topleft)
-
-            import math
-
-            rad = math.radians(heading_deg)
-            dx_world = math.sin(rad)
-            dy_world = math.cos(rad)
-            dx = dx_world
-            dy = -dy_world
-            half_len = length // 2
-
-            # Threshold positions
-            end1 = (center_point[0] + dx * half_len, center_point[1] + dy * half_len)
-            end2 = (center_point[0] - dx * half_len, center_point[1] - dy * half_len)
-
-            offset = 40
-            pos1 = (end1[0] + dx * offset, end1[1] + dy * offset)
-            pos2 = (end2[0] - dx * offset, end2[1] - dy * offset)
-
-            label_font = pygame.font.SysFont(FONT_NAME, 22, bold=True)
-
-            def draw_label(text, pos, heading):
-                text_surf = label_font.render(text, True, (255, 255, 255))
-                text_rot = pygame.transform.rotozoom(text_surf, rotation, zoom)
-                pos_screen = transform_point(pos)
-                text_rect = text_rot.get_rect(center=(int(pos_screen.x), int(pos_screen.y)))
-                surface.blit(text_rot, text_rect)
-
-            draw_label(label1, pos1, heading_deg)
-            draw_label(label2, pos2, heading_deg)
-
-        def offset_perpendicular(base_center, heading_deg, distance):
-            import math
-
-            rad = math.radians(heading_deg)
-            dx_world = math.sin(rad)
-            dy_world = math.cos(rad)
-            # perpendicular vector (positive to the left of heading) in world coordinates
-            px_world = -dy_world
-            py_world = dx_world
-            px = px_world
-            py = -py_world
-            return (base_center[0] + px * distance, base_center[1] + py * distance)
-
-        # Draw runways depending on airport
-        airport = SETTINGS.get("Airport", "Heathrow")
-        # --- Helper for drawing entry points (red dots) ---
-        def draw_entry_points(center_point, length, heading_deg):
-            import math
-            # 5km in meters
-            entry_dist_m = 5000
-            entry_dist_px = entry_dist_m * PIXELS_PER_METER
-            # Get heading vector (runway direction)
-            rad = math.radians(heading_deg)
-            dx = math.sin(rad)
-            dy = -math.cos(rad)
-            half_len = length // 2
-            # World positions of runway thresholds
-            end1 = (center_point[0] + dx * half_len, center_point[1] + dy * half_len)
-            end2 = (center_point[0] - dx * half_len, center_point[1] - dy * half_len)
-            # Entry points: 5 km further away from each threshold along the runway heading
-            entry1 = (end1[0] + dx * entry_dist_px, end1[1] + dy * entry_dist_px)
-            entry2 = (end2[0] - dx * entry_dist_px, end2[1] - dy * entry_dist_px)
-            # Convert to screen
-            pos1 = transform_point(entry1)
-            pos2 = transform_point(entry2)
-            pygame.draw.circle(screen, (255,0,0), (int(pos1.x), int(pos1.y)), 5)
-            pygame.draw.circle(screen, (255,0,0), (int(pos2.x), int(pos2.y)), 5)
-        def get_entry_points(center_point, length, heading_deg):
-            import math
-            entry_dist_m = 5000
-            entry_dist_px = entry_dist_m * PIXELS_PER_METER
-            rad = math.radians(heading_deg)
-            dx = math.sin(rad)
-            dy = -math.cos(rad)
-            half_len = length // 2
-            end1 = (center_point[0] + dx * half_len, center_point[1] + dy * half_len)
-            end2 = (center_point[0] - dx * half_len, center_point[1] - dy * half_len)
-            entry1 = (end1[0] + dx * entry_dist_px, end1[1] + dy * entry_dist_px)
-            entry2 = (end2[0] - dx * entry_dist_px, end2[1] - dy * entry_dist_px)
-            return [pygame.Vector2(entry1), pygame.Vector2(entry2)]
-
-        # London Heathrow: two parallel east-west runways (09L/27R and 09R/27L)
-        if airport.lower() in ["heathrow", "london heathrow"]:
-            heading = 90
-            r_length = 300
-            r_width = 14
-            spacing = 48
-            upper_center = offset_perpendicular(center, heading, spacing)
-            lower_center = offset_perpendicular(center, heading, -spacing)
-            draw_runway(screen, upper_center, r_length, r_width, heading, "09L", "27R")
-            draw_entry_points(upper_center, r_length, heading)
-            points = get_entry_points(upper_center, r_length, heading)
-            # Assign entry points and headings
-            runway_entry_points["09L"] = points[0]
-            runway_headings["09L"] = 90
-            runway_entry_points["27R"] = points[1]
-            runway_headings["27R"] = 270
-
-            draw_runway(screen, lower_center, r_length, r_width, heading, "09R", "27L")
-            draw_entry_points(lower_center, r_length, heading)
-            points2 = get_entry_points(lower_center, r_length, heading)
-            runway_entry_points["09R"] = points2[0]
-            runway_headings["09R"] = 90
-            runway_entry_points["27L"] = points2[1]
-            runway_headings["27L"] = 270
-        # Glasgow: two NE-SW runways (05/23), slightly separated
-        elif airport.lower() == "glasgow":
-            heading = 50
-            r_length = 250
-            r_width = 12
-            draw_runway(screen, center, r_length, r_width, heading, "05", "23")
-            draw_entry_points(center, r_length, heading)
-            points = get_entry_points(center, r_length, heading)
-            runway_entry_points["05"] = points[0]
-            runway_headings["05"] = 50
-            runway_entry_points["23"] = points[1]
-            runway_headings["23"] = 230
-        # Los Angeles: two parallel west-east runways (25L/07R and 25R/07L)
-        elif airport.lower() in ["los angeles", "lax"]:
-            heading = 250
-            r_length = 320
-            r_width = 16
-            spacing = 56
-            upper_center = offset_perpendicular(center, heading, spacing)
-            lower_center = offset_perpendicular(center, heading, -spacing)
-            draw_runway(screen, upper_center, r_length, r_width, heading, "25L", "07R")
-            draw_entry_points(upper_center, r_length, heading)
-            points = get_entry_points(upper_center, r_length, heading)
-            runway_entry_points["25L"] = points[0]
-            runway_headings["25L"] = 250
-            runway_entry_points["07R"] = points[1]
-            runway_headings["07R"] = 70
-
-            draw_runway(screen, lower_center, r_length, r_width, heading, "25R", "07L")
-            draw_entry_points(lower_center, r_length, heading)
-            points2 = get_entry_points(lower_center, r_length, heading)
-            runway_entry_points["25R"] = points2[0]
-            runway_headings["25R"] = 250
-            runway_entry_points["07L"] = points2[1]
-            runway_headings["07L"] = 70
+        # --- Runways and their entry points, prebuilt per airport and zoom ---
+        airport_layer, airport_topleft = airport_layers.get(sim.airport, zoom, WINDOW_SIZE)
+        screen.blit(airport_layer, airport_topleft)
+        profiler.mark("layers")
 
         # --- Dynamic Scale Bar (right side of screen) ---
         possible_scales = [1, 2, 4, 5, 10]  # candidate scales in NM
@@ -579,92 +200,43 @@ def simulation_screen():
         pygame.draw.line(screen, (255, 255, 255), (bar_x - 12, bar_y_top), (bar_x + 12, bar_y_top), 3)
 
         # Label in NM
-        label = font_button.render(f"{scale_nm} NM", True, (255, 255, 255))
+        label = render_text(font_button, f"{scale_nm} NM", (255, 255, 255))
         label_rect = label.get_rect(midleft=(bar_x + 20, (bar_y_bottom + bar_y_top)//2))
         screen.blit(label, label_rect)
 
-        removal_queue = []
-        if not paused and not game_over:
-            spawn_timer += dt
-            if spawn_timer >= next_spawn_time and len(aircrafts) < 10:
-                spawn_aircraft()
-            for ac in list(aircrafts):
-                outcome = ac.update(dt, approach_target)
-                if outcome:
-                    removal_queue.append((ac, outcome))
-
-        if removal_queue:
-            for ac, outcome in removal_queue:
-                if ac in aircrafts:
-                    aircrafts.remove(ac)
-                if ac.selected:
-                    ac.selected = False
-                if selected_aircraft is ac:
-                    selected_aircraft = None
-                if outcome == "landed":
-                    append_message(ac.callsign, f"{ac.callsign} landed successfully.")
-        for ac in list(aircrafts):
-            if not world_bounds.collidepoint(ac.pos.x, ac.pos.y):
-                aircrafts.remove(ac)
-                if ac.selected:
-                    ac.selected = False
-                if selected_aircraft is ac:
-                    selected_aircraft = None
-                append_message(ac.callsign, f"{ac.callsign} left airspace.")
-                continue
-            ac.draw(screen, zoom, transform_point)
-
-        # --- Conflict detection ---
-        # Reset conflicts
-        for ac in aircrafts:
-            ac.conflict = False
-        any_conflict = False
-        for i in range(len(aircrafts)):
-            for j in range(i + 1, len(aircrafts)):
-                ac1, ac2 = aircrafts[i], aircrafts[j]
-                horiz_nm = (ac1.pos - ac2.pos).length() / PIXELS_PER_NM
-                alt_diff = abs(ac1.altitude_ft - ac2.altitude_ft)
-                if horiz_nm < 2.5 and alt_diff < 1000:
-                    ac1.conflict = True
-                    ac2.conflict = True
-                    any_conflict = True
-
-        # --- Halo overlap/game over detection ---
-        if not game_over:
-            for i in range(len(aircrafts)):
-                for j in range(i + 1, len(aircrafts)):
-                    ac1, ac2 = aircrafts[i], aircrafts[j]
-                    # Convert to screen space
-                    p1 = transform_point(ac1.pos)
-                    p2 = transform_point(ac2.pos)
-                    dist = (p1 - p2).length()
-                    r1 = max(10, int(ac1.base_pick_radius * zoom * 1.1))
-                    r2 = max(10, int(ac2.base_pick_radius * zoom * 1.1))
-                    alt_diff = abs(ac1.altitude_ft - ac2.altitude_ft)
-                    if dist < (r1 + r2) and alt_diff < 1000:
-                        game_over = True
-                        break
-                if game_over:
-                    break
+        # --- Advance the simulation ---
+        profiler.mark("hud")
+        if not replaying:
+            sim.zoom = zoom
+        if not paused:
+            sim.advance(dt)
+        profiler.skip()
+        if selected_aircraft is not None and selected_aircraft not in sim.aircrafts:
+            selected_aircraft = None
+        game_over = sim.game_over
+
+        for ac in sim.aircrafts:
+            screen_updates.add(draw_aircraft(screen, ac, zoom, transform_point, aircraft_label_font,
+                                                     aircraft_atlas, ac is selected_aircraft))
+        profiler.mark("aircraft")
 
         # --- Top Bar ---
         top_bar_height = 64
         pygame.draw.rect(screen, (0, 32, 48), (0, 0, WINDOW_SIZE[0], top_bar_height))
         pygame.draw.line(screen, (20, 80, 100), (0, top_bar_height), (WINDOW_SIZE[0], top_bar_height), 2)
+        top_bar_state = (sim.any_conflict, time_scale)
+        if top_bar_state != drawn_top_bar:
+            screen_updates.add((0, 0, WINDOW_SIZE[0], top_bar_height + 2))
+            drawn_top_bar = top_bar_state
         # Draw conflict alert after top bar is drawn
-        if any_conflict:
-            conflict_text = font_title.render("CONFLICT ALERT", True, (255, 60, 60))
+        if sim.any_conflict:
+            conflict_text = render_text(font_title, "CONFLICT ALERT", (255, 60, 60))
             screen.blit(conflict_text, conflict_text.get_rect(center=(WINDOW_SIZE[0]//2, top_bar_height//2)))
             # Secondary info line on the bar too, slightly lower
-            conflict_text2 = font_button.render("WARNING: Aircraft at risk of collision", True, (255, 180, 180))
+            conflict_text2 = render_text(font_button, "WARNING: Aircraft at risk of collision", (255, 180, 180))
             screen.blit(conflict_text2, conflict_text2.get_rect(center=(WINDOW_SIZE[0]//2, top_bar_height//2 + 26)))
-            if CONFLICT_SOUND:
-                CONFLICT_SOUND.play()
-            if ALERT_SOUND:
-                now_time = time.time()
-                if now_time - last_alert_time >= alert_cooldown:
-                    ALERT_SOUND.play()
-                    last_alert_time = now_time
+            audio.play("conflict")
+            audio.play("alert")
 
         # Top bar buttons (simple icons)
         icon_y = top_bar_height // 2
@@ -696,8 +268,7 @@ def simulation_screen():
         )
         # Draw speed text (e.g., "0.5x", "1x", "2x", "4x", "8x") near icon
         speed_str = f"{time_scale}x" if time_scale != int(time_scale) else f"{int(time_scale)}x"
-        speed_font = pygame.font.SysFont(FONT_NAME, 16, bold=True)
-        speed_surf = speed_font.render(speed_str, True, icon_color)
+        speed_surf = render_text(font_speed, speed_str, icon_color)
         speed_rect = speed_surf.get_rect(midleft=(icon_xs[0] + 22, icon_y))
         screen.blit(speed_surf, speed_rect)
 
@@ -706,12 +277,11 @@ def simulation_screen():
         pygame.draw.rect(screen, icon_color, (icon_xs[1]+8, icon_y-14, 6, 28))
         # Help icon (circle with ?)
         pygame.draw.circle(screen, icon_color, (icon_xs[2], icon_y), 16, 2)
-        qfont = pygame.font.SysFont(FONT_NAME, 24)
-        draw_text("?", qfont, icon_color, screen, icon_xs[2], icon_y)
+        draw_text("?", font_help, icon_color, screen, icon_xs[2], icon_y)
 
         # Airport label in top-right
         label_text = SETTINGS.get("Airport", "Heathrow")
-        label_surf = font_title.render(label_text, True, icon_color)
+        label_surf = render_text(font_title, label_text, icon_color)
         label_rect = label_surf.get_rect(topright=(WINDOW_SIZE[0] - 32, 12))
         screen.blit(label_surf, label_rect)
 
@@ -719,54 +289,37 @@ def simulation_screen():
         info_surface = pygame.Surface((info_panel.width, info_panel.height), pygame.SRCALPHA)
         info_surface.fill((0, 0, 0, 150))
         screen.blit(info_surface, info_panel.topleft)
+        # Ranges change every frame, so the panel is always redrawn
+        screen_updates.add(info_panel)
 
-        traffic_title = font_button.render("Traffic", True, icon_color)
+        traffic_title = render_text(font_button, "Traffic", icon_color)
         screen.blit(traffic_title, (info_panel.left + 12, info_panel.top + 12))
 
         list_y = info_panel.top + 56
-        for ac in sorted(aircrafts, key=lambda a: a.distance_to_target)[:4]:
+        for ac in sorted(sim.aircrafts, key=lambda a: a.distance_to_target)[:4]:
             text = f"{ac.callsign:<6} {ac.range_nm:>4.1f} NM"
-            traffic_line = aircraft_label_font.render(text, True, (255, 255, 255))
+            traffic_line = render_text(aircraft_label_font, text, (255, 255, 255))
             screen.blit(traffic_line, (info_panel.left + 12, list_y))
             list_y += 26
 
         detail_y = info_panel.top + 150
         if selected_aircraft:
-            detail_title = aircraft_label_font.render("Selected", True, icon_color)
+            detail_title = render_text(aircraft_label_font, "Selected", icon_color)
             screen.blit(detail_title, (info_panel.left + 12, detail_y))
             detail_y += 24
             for line in selected_aircraft.info_lines():
-                info_line = aircraft_label_font.render(line, True, (255, 255, 255))
+                info_line = render_text(aircraft_label_font, line, (255, 255, 255))
                 screen.blit(info_line, (info_panel.left + 12, detail_y))
                 detail_y += 24
         else:
-            hint = aircraft_label_font.render("Click aircraft", True, (200, 200, 200))
+            hint = render_text(aircraft_label_font, "Click aircraft", (200, 200, 200))
             screen.blit(hint, (info_panel.left + 12, detail_y))
 
-        # --- Chat/message log (top-left) ---
+        # --- Chat/message log (top-left), fading out over 8 seconds ---
+        profiler.mark("hud")
         now = time.time()
-        chat_x = 24
-        chat_y = top_bar_height + 12
-        line_spacing = 8
-        msg_y = chat_y
-        # Only show recent messages (not faded out)
-        for sender, text, timestamp in messages:
-            dt = now - timestamp
-            fade = min(dt / 8, 1.0)
-            alpha = max(0, 255 - int(fade * 255))
-            if alpha == 0:
-                continue
-            # Render sender label (yellow), then message text (white) next to it, both with alpha
-            sender_label = f"{sender}:"
-            sender_surf = chat_font.render(sender_label, True, (255, 230, 0))
-            sender_surf.set_alpha(alpha)
-            text_surf = chat_font.render(text, True, (255, 255, 255))
-            text_surf.set_alpha(alpha)
-            sender_rect = sender_surf.get_rect(topleft=(chat_x, msg_y))
-            text_rect = text_surf.get_rect(topleft=(sender_rect.right + 8, msg_y))
-            screen.blit(sender_surf, sender_rect)
-            screen.blit(text_surf, text_rect)
-            msg_y += max(sender_rect.height, text_rect.height) + line_spacing
+        screen_updates.add(messages.draw(screen, (24, top_bar_height + 12), now))
+        profiler.mark("chat")
 
         # --- Bottom Bar ---
         bottom_bar_height = 48
@@ -783,7 +336,7 @@ def simulation_screen():
         pygame.draw.rect(screen, (24, 48, 64), input_rect, border_radius=8)
         pygame.draw.rect(screen, (255, 230, 0), input_rect, 2, border_radius=8)
         # Render the command text inside the input box
-        txt_surf = font_button.render(command_text, True, (255, 255, 255))
+        txt_surf = render_text(font_button, command_text, (255, 255, 255))
         txt_rect = txt_surf.get_rect(midleft=(input_rect.left + 12, input_rect.centery))
         screen.blit(txt_surf, txt_rect)
         # Draw blinking cursor if focused (always focused in this context)
@@ -795,6 +348,9 @@ def simulation_screen():
             cursor_y1 = txt_rect.top + 4
             cursor_y2 = txt_rect.bottom - 4
             pygame.draw.line(screen, (255, 255, 255), (cursor_x, cursor_y1), (cursor_x, cursor_y2), 2)
+        if (command_text, cursor_visible) != drawn_input:
+            screen_updates.add(input_rect)
+            drawn_input = (command_text, cursor_visible)
 
         # Draw PAUSED overlay with pause menu if paused
         if paused:
@@ -820,9 +376,10 @@ def simulation_screen():
                 Button("Restart Level", btn_centers[2], restart_level),
                 Button("Main Menu", btn_centers[3], lambda: change_scene("menu")),
             ]
-            # Draw the buttons
+            # Draw the buttons; they change colour on hover
             for b in pause_menu_buttons:
                 b.draw(screen)
+                screen_updates.add(b.rect)
 
         # Draw GAME OVER overlay if game_over
         if game_over:
@@ -834,16 +391,45 @@ def simulation_screen():
             # Draw Main Menu button centered below the message
             gameover_menu_btn = Button("Main Menu", (WINDOW_SIZE[0]//2, WINDOW_SIZE[1]//2 + 40), lambda: change_scene("menu"), width=240, height=60)
             gameover_menu_btn.draw(screen)
+            screen_updates.add(gameover_menu_btn.rect)
+
+        # --- Profiler overlay (bottom-left), refreshed a few times a second ---
+        if show_profiler:
+            if profiler_overlay is None or now - profiler_built >= PROFILER_REFRESH:
+                profiler_overlay = build_profiler_overlay(profiler, aircraft_label_font)
+                profiler_built = now
+            overlay_rect = profiler_overlay.get_rect(bottomleft=(24, WINDOW_SIZE[1] - bottom_bar_height - 12))
+            screen_updates.add(screen.blit(profiler_overlay, overlay_rect))
+
+        view_state = (zoom, paused, game_over, show_profiler)
+        if view_state != drawn_view:
+            screen_updates.invalidate()
+            drawn_view = view_state
 
         # --- Event handling ---
+        profiler.mark("hud")
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if not replaying:
+                    scenario.save(LAST_SCENARIO_PATH)
                 pygame.quit()
                 sys.exit()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     change_scene("menu")
                     continue
+                if event.key == pygame.K_F3:
+                    show_profiler = not show_profiler
+                    profiler_overlay = None
+                    continue
+                if event.key == pygame.K_F4:
+                    if profiler.recording:
+                        profiler.stop_csv()
+                        append_message("Profiler", f"Frame timings saved to {PROFILE_CSV_PATH}")
+                    else:
+                        profiler.start_csv(PROFILE_CSV_PATH)
+                        append_message("Profiler", f"Recording frame timings to {PROFILE_CSV_PATH}")
+                    continue
 
                 if event.key in (pygame.K_MINUS, pygame.K_UNDERSCORE, pygame.K_KP_MINUS):
                     zoom = max(ZOOM_MIN, round(zoom - ZOOM_STEP, 2))
@@ -852,13 +438,13 @@ def simulation_screen():
                     zoom = min(ZOOM_MAX, round(zoom + ZOOM_STEP, 2))
                     continue
 
-                # Only handle input if not paused or game_over
-                if not paused and not game_over:
+                # Only handle input if not paused or game_over (or replaying)
+                if not paused and not game_over and not replaying:
                     if event.key == pygame.K_RETURN or event.key == pygame.K_KP_ENTER:
                         cmd = command_text.strip()
                         if cmd:
                             append_message("You", cmd)
-                            process_command(cmd)
+                            sim.process_command(cmd)
                         command_text = ""
                     elif event.key == pygame.K_BACKSPACE:
                         command_text = command_text[:-1]
@@ -901,19 +487,13 @@ def simulation_screen():
                     if gameover_menu_btn.is_clicked((mx, my)):
                         gameover_menu_btn.activate()
                 else:
-                    clicked_ac = None
-                    for ac in reversed(aircrafts):
-                        if ac.contains_point((mx, my), zoom, transform_point):
-                            clicked_ac = ac
-                            break
+                    if not replaying:
+                        sim.zoom = zoom
+                    clicked_ac = sim.aircraft_at(sim.screen_to_world((mx, my)))
                     if clicked_ac:
                         if selected_aircraft is clicked_ac:
-                            clicked_ac.selected = False
                             selected_aircraft = None
                         else:
-                            if selected_aircraft:
-                                selected_aircraft.selected = False
-                            clicked_ac.selected = True
                             selected_aircraft = clicked_ac
                             append_message(clicked_ac.callsign, f"{clicked_ac.callsign} selected.")
                         continue
@@ -941,101 +521,45 @@ def simulation_screen():
                     if help_dist <= 24:
                         change_scene("tutorial")
 
-        pygame.display.flip()
+        profiler.mark("events")
+        screen_updates.present()
+        profiler.mark("flip")
+        profiler.end_frame()
         clock.tick(60)
 
+    profiler.stop_csv()
+    messages.close()
+    if not replaying:
+        scenario.save(LAST_SCENARIO_PATH)
 
 
-def _load_button_sound():
-    if not _mixer_ready:
-        return None
-    candidates = [
-        "Soundeffect.wav",
-        "Soundeffect.ogg",
-        "Soundeffect.mp3",
-        "Soundeffect",
-    ]
-    for name in candidates:
-        path = Path(name)
-        if path.exists():
-            try:
-                return pygame.mixer.Sound(str(path))
-            except pygame.error as exc:
-                print(f"Failed to load button sound '{name}': {exc}")
-    return None
-
-def _load_conflict_sound():
-    if not _mixer_ready:
-        return None
-    candidates = [
-        "conflict.wav",
-        "conflict.ogg",
-        "conflict.mp3",
-        "conflict",
-    ]
-    for name in candidates:
-        path = Path(name)
-        if path.exists():
-            try:
-                return pygame.mixer.Sound(str(path))
-            except pygame.error as exc:
-                print(f"Failed to load conflict sound '{name}': {exc}")
-    return None
-
-def _load_alert_sound():
-    if not _mixer_ready:
-        return None
-    candidates = [
-        "alert.wav",
-        "alert.ogg",
-        "alert.mp3",
-        "alert",
-    ]
-    for name in candidates:
-        path = Path(name)
-        if path.exists():
-            try:
-                return pygame.mixer.Sound(str(path))
-            except pygame.error as exc:
-                print(f"Failed to load alert sound '{name}': {exc}")
-    return None
-
-BUTTON_SOUND = _load_button_sound()
-CONFLICT_SOUND = _load_conflict_sound()
-ALERT_SOUND = _load_alert_sound()   # <-- add this
-
-BUTTON_SOUND = _load_button_sound()
-CONFLICT_SOUND = _load_conflict_sound()
-
-
-def play_button_sound():
-    if not BUTTON_SOUND:
-        print("No button sound loaded")
-        return
-    volume_setting = SETTINGS.get("master_volume", "Medium")
-    print("Volume setting:", volume_setting)
-    if volume_setting == "Off":
-        print("Muted")
-        return
-    elif volume_setting == "Low":
-        BUTTON_SOUND.set_volume(0.25)
-    elif volume_setting == "Medium":
-        BUTTON_SOUND.set_volume(0.6)
-    elif volume_setting == "High":
-        BUTTON_SOUND.set_volume(1.0)
-    else:
-        BUTTON_SOUND.set_volume(0.6)
-    print("Playing sound at volume", BUTTON_SOUND.get_volume())
-    BUTTON_SOUND.play()
-    
 # --- Helper functions ---
 def draw_text(text, font, color, surface, x, y):
     """Draw text centered at (x, y)."""
-    text_obj = font.render(text, True, color)
+    text_obj = render_text(font, text, color)
     text_rect = text_obj.get_rect(center=(x, y))
     surface.blit(text_obj, text_rect)
     return text_rect
 
+def wait_for_input(buttons, timeout_ms=IDLE_REDRAW_MS):
+    """Block until something would change a static scene and return its events.
+
+    Mouse motion only counts when it moves the pointer onto or off a button;
+    returns an empty list once ``timeout_ms`` passes without any input.
+    """
+    mouse = pygame.mouse.get_pos()
+    hovered = [b.rect.collidepoint(mouse) for b in buttons]
+    while True:
+        event = pygame.event.wait(timeout_ms)
+        if event.type == pygame.NOEVENT:
+            return []
+        events = [event] + pygame.event.get()
+        if any(e.type != pygame.MOUSEMOTION for e in events):
+            return events
+        mouse = pygame.mouse.get_pos()
+        if [b.rect.collidepoint(mouse) for b in buttons] != hovered:
+            return events
+
 def draw_text_multi_color(segments, font, surface, center_x, center_y):
     """Draw a single line with differently colored segments centered at (center_x, center_y).
     segments: list of (text, (r,g,b)) tuples
@@ -1044,7 +568,7 @@ def draw_text_multi_color(segments, font, surface, center_x, center_y):
     total_width = sum(widths)
     x = center_x - total_width // 2
     for (txt, color), w in zip(segments, widths):
-        surf = font.render(txt, True, color)
+        surf = render_text(font, txt, color)
         rect = surf.get_rect(midleft=(x, center_y))
         surface.blit(surf, rect)
         x += w
@@ -1059,6 +583,8 @@ def main_menu():
         Button("Exit", (80, WINDOW_SIZE[1]-40), lambda: pygame.quit() or sys.exit())
     ]
 
+    # After the first full flip only the buttons (hover colour) are pushed
+    screen_updates = DirtyRects(WINDOW_SIZE)
     while current_scene == "menu":
         # --- draw background image ---
         screen.blit(background_menu, (0, 0))
@@ -1066,8 +592,12 @@ def main_menu():
         draw_text("Air Traffic Controller Simulator", font_title, (255, 255, 255), screen, WINDOW_SIZE[0]//2, 80)
         for b in buttons:
             b.draw(screen)
+            screen_updates.add(b.rect)
+        screen_updates.present()
+        clock.tick(60)
 
-        for event in pygame.event.get():
+        # Nothing moves on this screen, so sleep until there is input
+        for event in wait_for_input(buttons):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -1076,8 +606,6 @@ def main_menu():
                     if b.is_clicked(event.pos):
                         b.activate()
 
-        pygame.display.flip()
-        clock.tick(60)
 class Button:
     def __init__(self, text, center, action, width=300, height=60, play_sound=True):
         self.text = text
@@ -1105,7 +633,7 @@ class Button:
         pygame.draw.rect(surface, (255, 255, 255), self.rect, width=2, border_radius=12)
 
         # Draw button text
-        text_surf = font_button.render(self.text, True, (255, 255, 255))
+        text_surf = render_text(font_button, self.text, (255, 255, 255))
         text_rect = text_surf.get_rect(center=self.rect.center)
         surface.blit(text_surf, text_rect)
 
@@ -1114,7 +642,7 @@ class Button:
 
     def activate(self):
         if self.play_sound:
-            play_button_sound()
+            audio.play("button")
         if self.action:
             self.action()
 
@@ -1129,6 +657,7 @@ def change_scene(name):
 def credits_screen():
     buttons = [Button("Back", (80, WINDOW_SIZE[1]-40), lambda: change_scene("menu"))]
 
+    screen_updates = DirtyRects(WINDOW_SIZE)
     while current_scene == "credits":
         screen.blit(background_generic, (0, 0))
 
@@ -1155,9 +684,12 @@ def credits_screen():
         # Draw buttons
         for b in buttons:
             b.draw(screen)
+            screen_updates.add(b.rect)
+        screen_updates.present()
+        clock.tick(60)
 
         # Handle events 
-        for event in pygame.event.get():
+        for event in wait_for_input(buttons):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -1166,9 +698,6 @@ def credits_screen():
                     if b.is_clicked(event.pos):
                         b.activate()
 
-        pygame.display.flip()
-        clock.tick(60)
-
 
 # Settings Page
 SETTINGS = {
@@ -1177,6 +706,7 @@ SETTINGS = {
     "gamemode": "Air",           # Ground/Air
     "Airport": "Heathrow",          # Low/Medium/High
 }
+audio.set_volume(SETTINGS["master_volume"])
 
 
 class Dropdown:
@@ -1201,13 +731,13 @@ class Dropdown:
         pygame.draw.rect(surface, (255, 255, 255), self.rect, 2, border_radius=8)
 
         # Selected text inside the box
-        sel_surf = font_button.render(self.value, True, (255, 255, 255))
+        sel_surf = render_text(font_button, self.value, (255, 255, 255))
         sel_rect = sel_surf.get_rect(midleft=(self.rect.left + 12, self.rect.centery))
         surface.blit(sel_surf, sel_rect)
 
         # Label above the box (drawn after so it isn't covered)
         label_text = f"{self.label}: {self.value}"
-        text_surf = font_button.render(label_text, True, (255, 255, 255))
+        text_surf = render_text(font_button, label_text, (255, 255, 255))
         text_rect = text_surf.get_rect(midbottom=(self.center[0], self.rect.top - 8))
         surface.blit(text_surf, text_rect)
 
@@ -1229,7 +759,7 @@ class Dropdown:
                 bg = (60, 60, 60) if i != self.index else (0, 149, 0)
                 pygame.draw.rect(surface, bg, r)
                 pygame.draw.rect(surface, (255, 255, 255), r, 1)
-                osurf = font_button.render(opt, True, (255, 255, 255))
+                osurf = render_text(font_button, opt, (255, 255, 255))
                 orect = osurf.get_rect(midleft=(r.left + 12, r.centery))
                 surface.blit(osurf, orect)
 
@@ -1313,6 +843,7 @@ def settings_screen():
         SETTINGS["difficulty"] = dd_difficulty.value
         SETTINGS["gamemode"] = dd_gamemode.value
         SETTINGS["Airport"] = dd_airports.value
+        audio.set_volume(SETTINGS["master_volume"])
         change_scene("menu")
 
     def reset_defaults():
@@ -1324,10 +855,14 @@ def settings_screen():
         SETTINGS["difficulty"] = "Normal"
         SETTINGS["gamemode"] = "Air"
         SETTINGS["Airport"] = "London Heathrow"
+        audio.set_volume(SETTINGS["master_volume"])
 
     apply_btn.action = apply_changes
     reset_btn.action = reset_defaults
 
+    dropdowns = (dd_master_vol, dd_gamemode, dd_difficulty, dd_airports)
+    screen_updates = DirtyRects(WINDOW_SIZE)
+    drawn_dropdowns = None
     while current_scene == "settings":
         screen.blit(background_generic, (0, 0))
 
@@ -1350,13 +885,23 @@ def settings_screen():
         reset_btn.draw(screen)
         apply_btn.draw(screen)
         back_btn.draw(screen)
+        for b in (reset_btn, apply_btn, back_btn):
+            screen_updates.add(b.rect)
 
         # Re-draw open dropdowns last so their menus are on top
-        for dd in (dd_master_vol, dd_gamemode, dd_difficulty, dd_airports):
+        for dd in dropdowns:
             if dd.open:
                 dd.draw(screen)
 
-        for event in pygame.event.get():
+        # Opening a list or picking an option redraws the whole panel
+        dropdown_state = tuple((dd.open, dd.index) for dd in dropdowns)
+        if dropdown_state != drawn_dropdowns:
+            screen_updates.invalidate()
+            drawn_dropdowns = dropdown_state
+        screen_updates.present()
+        clock.tick(60)
+
+        for event in wait_for_input((reset_btn, apply_btn, back_btn)):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -1375,9 +920,6 @@ def settings_screen():
                 elif apply_btn.is_clicked(event.pos):
                     apply_btn.activate()
 
-        pygame.display.flip()
-        clock.tick(60)
-
 # Tutorial Screen
 
 def tutorial_screen():
@@ -1403,15 +945,17 @@ def tutorial_screen():
         else:
             change_scene("menu")  # Finish returns to menu
 
-    def open_pdf(pdf_path: str):
-        abs_path = os.path.abspath(pdf_path)
-        if not os.path.exists(abs_path):
-            print(f"PDF not found: {abs_path}")
+    def open_pdf(document: str):
+        path = assets.file(document)
+        if path is None:
+            print(f"PDF not found: {DOCUMENT_FILES[document][0]}")
             return
-        webbrowser.open_new(Path(abs_path).as_uri())  # opens in default viewer
+        webbrowser.open_new(path.as_uri())  # opens in default viewer
 
     back_btn = Button("Back", (80, WINDOW_SIZE[1]-40), lambda: change_scene("menu"))
 
+    screen_updates = DirtyRects(WINDOW_SIZE)
+    drawn_page = None
     while current_scene == "tutorial":
         screen.blit(background_generic, (0, 0))
 
@@ -1457,7 +1001,7 @@ def tutorial_screen():
             pdf_btn = Button(
                 "Open PDF",
                 (box_x + 180, box_y + box_height - 40),
-                lambda: open_pdf("Runway09L.pdf"),
+                lambda: open_pdf("runway_09l"),
                 width=220,
                 height=50,
             )
@@ -1474,7 +1018,7 @@ def tutorial_screen():
             pdf_btn = Button(
                 "Open PDF",
                 (box_x + 180, box_y + box_height - 40),
-                lambda: open_pdf("Groundmap.pdf"),
+                lambda: open_pdf("ground_map"),
                 width=220,
                 height=50,
             )
@@ -1484,8 +1028,17 @@ def tutorial_screen():
         if pdf_btn:
             pdf_btn.draw(screen)
         ack_btn.draw(screen)
+        visible_buttons = [b for b in (back_btn, pdf_btn, ack_btn) if b]
+        for b in visible_buttons:
+            screen_updates.add(b.rect)
+        if page_index != drawn_page:
+            screen_updates.invalidate()
+            drawn_page = page_index
+        screen_updates.present()
+        clock.tick(60)
+
         # Events
-        for event in pygame.event.get():
+        for event in wait_for_input(visible_buttons):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -1497,9 +1050,6 @@ def tutorial_screen():
                 elif ack_btn.is_clicked(event.pos):
                     ack_btn.activate()
 
-        pygame.display.flip()
-        clock.tick(60)
-
 
 def confirm_tutorial():
     # Panel dimensions similar to credits/tutorial screens
@@ -1515,6 +1065,7 @@ def confirm_tutorial():
                lambda: change_scene("start"), width=150, height=50),
     ]
 
+    screen_updates = DirtyRects(WINDOW_SIZE)
     while current_scene == "confirm_tutorial":
         screen.blit(background_generic, (0, 0))
 
@@ -1537,8 +1088,11 @@ def confirm_tutorial():
         # Draw the buttons
         for b in buttons:
             b.draw(screen)
+            screen_updates.add(b.rect)
+        screen_updates.present()
+        clock.tick(60)
 
-        for event in pygame.event.get():
+        for event in wait_for_input(buttons):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -1547,20 +1101,21 @@ def confirm_tutorial():
                     if b.is_clicked(event.pos):
                         b.action()
 
-        pygame.display.flip()
-        clock.tick(60)
-
 # Main loop
-while True:
-    if current_scene == "menu":
-        main_menu()
-    elif current_scene == "confirm_tutorial":
-        confirm_tutorial()
-    elif current_scene == "settings":
-        settings_screen()
-    elif current_scene == "tutorial":
-        tutorial_screen()
-    elif current_scene == "credits":
-        credits_screen()
-    elif current_scene == "start":
-        simulation_screen()
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--replay":
+        REPLAY_SCENARIO = Scenario.load(sys.argv[2])
+        current_scene = "start"
+    while True:
+        if current_scene == "menu":
+            main_menu()
+        elif current_scene == "confirm_tutorial":
+            confirm_tutorial()
+        elif current_scene == "settings":
+            settings_screen()
+        elif current_scene == "tutorial":
+            tutorial_screen()
+        elif current_scene == "credits":
+            credits_screen()
+        elif current_scene == "start":
+            simulation_screen()
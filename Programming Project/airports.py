@@ -0,0 +1,121 @@
+"""Airport definitions, loaded from the JSON files in ``airports/``.
+
+Each file describes one airport relative to its own centre::
+
+    {
+        "name": "Glasgow",
+        "aliases": ["EGPF"],
+        "runways": [
+            {"labels": ["05", "23"], "heading": 50, "length": 250, "width": 12,
+             "offset": 0, "entry_distance_m": 5000}
+        ],
+        "fixes": {"NAME": {"bearing": 60, "distance_nm": 22}}
+    }
+
+Runway ``heading`` is the direction landing on the first label, ``offset``
+moves the runway sideways (positive is left of the heading) and lengths are
+in scope pixels at zoom 1.0.  ``offset``, ``entry_distance_m``, ``aliases`` and
+``fixes`` are optional.  Files are validated once, on first use; the world
+geometry derived from them lives in ``simulation.airport_layout``.
+"""
+import json
+from pathlib import Path
+
+AIRPORT_DIR = Path(__file__).with_name("airports")
+
+
+class AirportError(ValueError):
+    """An airport file is missing, malformed or clashes with another one."""
+
+
+def _number(value, where, minimum=None, below=None):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise AirportError(f"{where} must be a number, not {value!r}")
+    if minimum is not None and value <= minimum:
+        raise AirportError(f"{where} must be greater than {minimum}")
+    if below is not None and not 0 <= value < below:
+        raise AirportError(f"{where} must be in [0, {below})")
+    return float(value)
+
+
+def _runway(spec, where):
+    if not isinstance(spec, dict):
+        raise AirportError(f"{where} must be an object")
+    labels = spec.get("labels")
+    if (not isinstance(labels, list) or len(labels) != 2
+            or not all(isinstance(label, str) and label for label in labels) or labels[0] == labels[1]):
+        raise AirportError(f"{where}: labels must be two different runway designators")
+    for key in ("heading", "length", "width"):
+        if key not in spec:
+            raise AirportError(f"{where}: missing {key!r}")
+    return {
+        "labels": (labels[0].upper(), labels[1].upper()),
+        "heading": _number(spec["heading"], f"{where}: heading", below=360),
+        "length": int(_number(spec["length"], f"{where}: length", minimum=0)),
+        "width": int(_number(spec["width"], f"{where}: width", minimum=0)),
+        "offset": _number(spec.get("offset", 0), f"{where}: offset"),
+        "entry_distance_m": _number(spec.get("entry_distance_m", 5000), f"{where}: entry_distance_m", minimum=0),
+    }
+
+
+def parse_airport(data, source="<airport>"):
+    """Validate one airport definition and return it with every default filled in."""
+    if not isinstance(data, dict):
+        raise AirportError(f"{source}: expected an object at the top level")
+    name = data.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise AirportError(f"{source}: missing airport name")
+    aliases = data.get("aliases", [])
+    if not isinstance(aliases, list) or not all(isinstance(alias, str) for alias in aliases):
+        raise AirportError(f"{source}: aliases must be a list of names")
+    runways = data.get("runways")
+    if not isinstance(runways, list) or not runways:
+        raise AirportError(f"{source}: an airport needs at least one runway")
+    runways = [_runway(spec, f"{source}: runway {i + 1}") for i, spec in enumerate(runways)]
+    labels = [label for runway in runways for label in runway["labels"]]
+    duplicates = sorted({label for label in labels if labels.count(label) > 1})
+    if duplicates:
+        raise AirportError(f"{source}: runway {', '.join(duplicates)} defined twice")
+    fixes = data.get("fixes", {})
+    if not isinstance(fixes, dict):
+        raise AirportError(f"{source}: fixes must be an object")
+    parsed_fixes = {}
+    for fix_name, fix in fixes.items():
+        where = f"{source}: fix {fix_name}"
+        if not isinstance(fix, dict) or "bearing" not in fix or "distance_nm" not in fix:
+            raise AirportError(f"{where} needs a bearing and a distance_nm")
+        parsed_fixes[fix_name.upper()] = {
+            "bearing": _number(fix["bearing"], f"{where}: bearing", below=360),
+            "distance_nm": _number(fix["distance_nm"], f"{where}: distance_nm", minimum=0),
+        }
+    return {"name": name.strip(), "aliases": [alias.strip() for alias in aliases], "runways": runways,
+            "fixes": parsed_fixes}
+
+
+def load_airports(directory=AIRPORT_DIR):
+    """Every airport in ``directory``, keyed by lower-case name and each alias."""
+    airports = {}
+    for path in sorted(Path(directory).glob("*.json")):
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except json.JSONDecodeError as exc:
+            raise AirportError(f"{path.name}: {exc}") from exc
+        airport = parse_airport(data, path.name)
+        for key in [airport["name"], *airport["aliases"]]:
+            key = key.lower()
+            if key in airports and airports[key] is not airport:
+                raise AirportError(f"{path.name}: {key!r} is already used by {airports[key]['name']}")
+            airports[key] = airport
+    return airports
+
+
+_airports = None
+
+
+def find_airport(name):
+    """The airport called ``name`` (or one of its aliases), or None; files load on first call."""
+    global _airports
+    if _airports is None:
+        _airports = load_airports()
+    return _airports.get(name.strip().lower())
@@ -0,0 +1,137 @@
+"""Images, sounds and documents loaded once and shared by every scene.
+
+Images are needed by the first frame, so ``image`` loads them on the spot,
+converted to the display format; each file is decoded once however many
+sizes are asked for.  Sounds and documents are not, so ``preload_sounds`` and
+``preload_files`` hand them to a background thread while the menu is already
+showing.  Until a background load finishes, ``sound`` returns None exactly
+as it would for a missing file, so callers never block.
+
+Every asset is named by a list of candidate file names; the first one that
+exists is used.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pygame
+
+from rendering import to_display_format
+
+
+class AssetManager:
+    def __init__(self, base_dir=".", audio=True):
+        self.base_dir = Path(base_dir)
+        self.audio = audio
+        self._decoded = {}  # (path, alpha) -> converted surface at its own size
+        self._images = {}   # (path, size, alpha) -> converted surface
+        self._pending = {}  # (kind, key) -> Future
+        self._files = {}    # key -> candidates
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def find(self, candidates):
+        """The first of ``candidates`` that exists under ``base_dir``, or None."""
+        if isinstance(candidates, (str, Path)):
+            candidates = (candidates,)
+        for name in candidates:
+            path = self.base_dir / name
+            if path.is_file():
+                return path
+        return None
+
+    # --- Images (loaded on demand, on the calling thread) ---
+    def image(self, candidates, size=None, alpha=False):
+        """A display-format copy of the image, scaled to ``size`` if given; None if missing."""
+        path = self.find(candidates)
+        if path is None:
+            return None
+        size = tuple(size) if size is not None else None
+        key = (path, size, alpha)
+        surface = self._images.get(key)
+        if surface is None:
+            surface = self._decoded.get((path, alpha))
+            if surface is None:
+                try:
+                    surface = to_display_format(pygame.image.load(str(path)), alpha)
+                except pygame.error as exc:
+                    print(f"Failed to load image '{path}': {exc}")
+                    return None
+                self._decoded[(path, alpha)] = surface
+            if size is not None and surface.get_size() != size:
+                surface = to_display_format(pygame.transform.scale(surface, size), alpha)
+            self._images[key] = surface
+        return surface
+
+    # --- Background loads ---
+    def _submit(self, kind, key, load):
+        with self._lock:
+            if (kind, key) in self._pending:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="assets")
+            self._pending[(kind, key)] = self._executor.submit(load)
+
+    def _result(self, kind, key):
+        future = self._pending.get((kind, key))
+        if future is None or not future.done():
+            return None
+        return future.result()
+
+    def _load_sound(self, candidates):
+        path = self.find(candidates)
+        if path is None:
+            return None
+        try:
+            return pygame.mixer.Sound(str(path))
+        except pygame.error as exc:
+            print(f"Failed to load sound '{path}': {exc}")
+            return None
+
+    def preload_sounds(self, sounds):
+        """Start decoding ``{key: candidates}`` in the background, in the given order."""
+        if not self.audio:
+            return
+        for key, candidates in sounds.items():
+            self._submit("sound", key, lambda candidates=candidates: self._load_sound(candidates))
+
+    def sound(self, key):
+        """The decoded ``pygame.mixer.Sound`` for ``key``, or None if missing or still loading."""
+        return self._result("sound", key)
+
+    def preload_files(self, files):
+        """Resolve ``{key: candidates}`` to absolute paths in the background.
+
+        Documents are opened by the system viewer, so only their location is
+        looked up here, keeping the disk access off the frame loop.
+        """
+        for key, candidates in files.items():
+            self._files[key] = candidates
+            self._submit("file", key, lambda candidates=candidates: self._resolve(candidates))
+
+    def _resolve(self, candidates):
+        path = self.find(candidates)
+        return path.resolve() if path is not None else None
+
+    def file(self, key):
+        """The absolute path for ``key``, or None if missing.
+
+        Looks it up on the spot if the background lookup has not finished.
+        """
+        future = self._pending.get(("file", key))
+        if future is not None and future.done():
+            return future.result()
+        return self._resolve(self._files[key]) if key in self._files else None
+
+    def wait(self, timeout=None):
+        """Block until every background load so far has finished."""
+        with self._lock:
+            futures = list(self._pending.values())
+        for future in futures:
+            future.exception(timeout)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
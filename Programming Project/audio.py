@@ -0,0 +1,91 @@
+"""Sound cues played on reserved mixer channels.
+
+Each kind of cue (button click, conflict tone, alert) owns a few reserved
+channels, so a burst of one never steals channels from another or from
+anything else using the mixer.  A cue is dropped instead of played when it
+came sooner than its ``min_interval`` after the last one, when (unless it
+may ``overlap``) the same sound is still playing, or when all its channels
+are busy.  Game code can therefore call ``play`` every frame something is
+true and it costs a dictionary lookup.
+
+The master volume is set on each sound once, when it changes (or when the
+sound first becomes available), never per play.
+"""
+import time
+
+import pygame
+
+VOLUME_LEVELS = {"Off": 0.0, "Low": 0.25, "Medium": 0.6, "High": 1.0}
+
+
+class Cue:
+    __slots__ = ("channels", "min_interval", "overlap")
+
+    def __init__(self, channels=1, min_interval=0.0, overlap=False):
+        self.channels = channels
+        self.min_interval = min_interval
+        self.overlap = overlap
+
+
+class AudioManager:
+    """Plays ``cues`` (``{name: Cue}``) with the sounds returned by ``sounds(name)``.
+
+    ``sounds`` may return None, e.g. while the sound is still loading, in which
+    case the cue is silently skipped.
+    """
+
+    def __init__(self, cues, sounds, enabled=True, clock=time.monotonic):
+        self.cues = dict(cues)
+        self.sounds = sounds
+        self.enabled = enabled
+        self.clock = clock
+        self.volume = VOLUME_LEVELS["Medium"]
+        self.channels = {}
+        self.last_played = {}
+        self._tuned = {}  # name -> the Sound object its volume was set on
+        if enabled:
+            reserved = sum(cue.channels for cue in self.cues.values())
+            pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), reserved))
+            pygame.mixer.set_reserved(reserved)
+            first = 0
+            for name, cue in self.cues.items():
+                self.channels[name] = [pygame.mixer.Channel(i) for i in range(first, first + cue.channels)]
+                first += cue.channels
+
+    def set_volume(self, level):
+        """Set the master volume from a settings name (``"Off"`` ... ``"High"``) or 0.0-1.0."""
+        volume = VOLUME_LEVELS.get(level, VOLUME_LEVELS["Medium"]) if isinstance(level, str) else float(level)
+        if volume == self.volume:
+            return
+        self.volume = volume
+        for sound in self._tuned.values():
+            sound.set_volume(volume)
+
+    def play(self, name):
+        """Play the cue if nothing holds it back; returns whether it was played."""
+        if not self.enabled or self.volume <= 0:
+            return False
+        cue = self.cues[name]
+        now = self.clock()
+        last = self.last_played.get(name)
+        if last is not None and now - last < cue.min_interval:
+            return False
+        sound = self.sounds(name)
+        if sound is None:
+            return False
+        channels = self.channels[name]
+        if not cue.overlap and any(channel.get_sound() is sound for channel in channels):
+            return False
+        channel = next((channel for channel in channels if not channel.get_busy()), None)
+        if channel is None:
+            return False
+        if self._tuned.get(name) is not sound:
+            sound.set_volume(self.volume)
+            self._tuned[name] = sound
+        channel.play(sound)
+        self.last_played[name] = now
+        return True
+
+    def stop(self, name):
+        for channel in self.channels.get(name, ()):
+            channel.stop()
@@ -0,0 +1,198 @@
+"""Benchmarks for the simulation engine and the radar renderer.
+
+Runs headless on SDL's dummy video driver.  For every airport, zoom level
+and traffic count it times, per tick or frame:
+
+* ``update``: integrating every aircraft one fixed step (``AircraftStore.update``)
+* ``conflicts``: rebuilding the broadphase plus conflict and collision checks
+* ``stca``: the short-term conflict alert's two-minute lookahead over every pair
+* ``parse``: parsing one command line addressing every aircraft once
+* ``render``: composing a radar frame (scope and airport layers, every
+  aircraft with halo, sprite and label) and presenting it
+
+and writes the median, 95th percentile and mean (milliseconds) to JSON::
+
+    python benchmark.py --out bench.json
+    python benchmark.py --counts 10 100 --compare bench.json
+
+``--compare`` prints how each median changed against an earlier results file.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+import pygame
+
+import airports
+import rendering
+from commands import parse_commands
+from simulation import FIXED_DT, WINDOW_SIZE, Simulation
+
+DEFAULT_COUNTS = (10, 100, 1000, 10000)
+DEFAULT_ZOOMS = (0.2, 1.0, 2.0)
+PHASES = ("update", "conflicts", "stca", "parse", "render")
+
+
+def default_airports():
+    return sorted({airport["name"] for airport in airports.load_airports().values()})
+
+
+def populated_simulation(airport, zoom, count, seed=0):
+    """A session with ``count`` aircraft scattered over the airspace, a tenth of them turning."""
+    sim = Simulation({"Airport": airport}, rng=random.Random(seed), max_aircraft=count)
+    sim.zoom = zoom
+    for _ in range(count):
+        sim.spawn_aircraft()
+    state = np.random.RandomState(seed)
+    store = sim.store
+    left, top, width, height = sim.world_bounds
+    store.pos[:count, 0] = state.uniform(left, left + width, count)
+    store.pos[:count, 1] = state.uniform(top, top + height, count)
+    store.altitude[:count] = state.uniform(2000, 12000, count)
+    store.revision += 1
+    for ac in list(sim.aircrafts)[::10]:
+        ac.apply_command(heading=state.randint(0, 360), speed=state.randint(140, 300),
+                         altitude=state.randint(30, 100) * 100)
+    return sim
+
+
+def aircraft_sprite():
+    """A 40 px stand-in for the aircraft art, so the sprite atlas path is measured."""
+    sprite = pygame.Surface((40, 40), pygame.SRCALPHA)
+    pygame.draw.polygon(sprite, (230, 230, 230), [(38, 20), (4, 6), (12, 20), (4, 34)])
+    return sprite
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(ordered) * 1000, 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 4),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "samples": len(ordered),
+    }
+
+
+def timed(function, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_case(airport, zoom, count, screen, font, atlas, repeats=None):
+    """Timings for one (airport, zoom, traffic count) combination."""
+    repeats = repeats or max(5, min(120, 20000 // count))
+    sim = populated_simulation(airport, zoom, count)
+    store = sim.store
+
+    def conflicts():
+        store.revision += 1  # as if everything moved, like every real tick
+        sim.detect_conflicts()
+        sim.detect_collisions()
+
+    line = "; ".join(f"{ac.callsign} HDG{i % 360:03d} FL{30 + i % 70:03d}" for i, ac in enumerate(sim.aircrafts))
+    center = pygame.Vector2(WINDOW_SIZE[0] / 2, WINDOW_SIZE[1] / 2)
+    base_radius = (min(WINDOW_SIZE) / 2 - 60) * 0.75
+
+    def transform_point(world_point):
+        return center + (pygame.Vector2(world_point) - center) * zoom
+
+    def render():
+        screen.blit(rendering.radar_layers.get(zoom, WINDOW_SIZE, base_radius), (0, 0))
+        layer, topleft = rendering.airport_layers.get(airport, zoom, WINDOW_SIZE)
+        screen.blit(layer, topleft)
+        for ac in sim.aircrafts:
+            rendering.draw_aircraft(screen, ac, zoom, transform_point, font, atlas)
+        pygame.display.flip()
+
+    render()  # build the cached layers and sprites outside the timing
+    return {
+        "airport": airport,
+        "zoom": zoom,
+        "aircraft": count,
+        "update": summarize(timed(lambda: store.update(FIXED_DT, sim.approach_target), repeats)),
+        "conflicts": summarize(timed(conflicts, repeats)),
+        "stca": summarize(timed(sim.detect_stca, max(2, repeats // 4))),
+        "parse": summarize(timed(lambda: parse_commands(line), repeats)),
+        "render": summarize(timed(render, max(3, repeats // 4))),
+    }
+
+
+def run_benchmarks(counts=DEFAULT_COUNTS, airport_names=None, zooms=DEFAULT_ZOOMS, repeats=None, log=None):
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode(WINDOW_SIZE)
+    font = rendering.fonts.get(rendering.FONT_NAME, 18)
+    atlas = rendering.SpriteAtlas(aircraft_sprite())
+    results = []
+    for airport in airport_names or default_airports():
+        for zoom in zooms:
+            for count in counts:
+                result = bench_case(airport, zoom, count, screen, font, atlas, repeats)
+                results.append(result)
+                if log:
+                    log(result)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+        },
+        "results": results,
+    }
+
+
+def format_row(result, baseline=None):
+    cells = [f"{result['airport']:<16} {result['zoom']:>4} {result['aircraft']:>6}"]
+    for phase in PHASES:
+        median = result[phase]["median_ms"]
+        cell = f"{phase} {median:9.3f}"
+        if baseline is not None and phase in baseline and baseline[phase]["median_ms"] > 0:
+            cell += f" ({median / baseline[phase]['median_ms']:5.2f}x)"
+        cells.append(cell)
+    return "  ".join(cells)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default="benchmark_results.json", help="where to write the JSON results")
+    parser.add_argument("--counts", type=int, nargs="+", default=DEFAULT_COUNTS)
+    parser.add_argument("--airports", nargs="+", help="airport names (default: every airport file)")
+    parser.add_argument("--zooms", type=float, nargs="+", default=DEFAULT_ZOOMS)
+    parser.add_argument("--repeats", type=int, help="samples per phase (default: scaled to traffic)")
+    parser.add_argument("--compare", help="earlier results file to compare medians against")
+    args = parser.parse_args(argv)
+
+    baselines = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            for result in json.load(f)["results"]:
+                baselines[(result["airport"], result["zoom"], result["aircraft"])] = result
+
+    def log(result):
+        print(format_row(result, baselines.get((result["airport"], result["zoom"], result["aircraft"]))), flush=True)
+
+    report = run_benchmarks(args.counts, args.airports, args.zooms, args.repeats, log)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(report['results'])} results to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,125 @@
+"""Radio command grammar: turns a typed (or scripted) line into commands.
+
+The grammar is case-insensitive and whitespace-tolerant::
+
+    line    := batch (";" batch)*
+    batch   := group+
+    group   := callsign ([","] callsign)* clause+
+    clause  := "HDG" n | "SPD" n | "FL" n
+             | "CLEARED TO LAND" ["RWY"] runway
+             | "CLEARED FOR TAKEOFF" [["RWY"] runway]
+
+so ``BA123 HDG090``, ``BA123, QR456 FL080 SPD220`` and
+``BA123 CLEARED TO LAND RWY09L; QR456 HDG270 LH789 FL060`` are all one line.
+Any subset of HDG, SPD and FL may be given.  A batch with a mistake in it is
+rejected as a whole; the other batches on the line still go through.
+"""
+import re
+
+MIN_SPEED_KTS = 40
+MAX_SPEED_KTS = 400
+
+NOT_TRANSMITTED = "Message not transmitted, please try again."
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<heading>(?:HDG|HEADING)\s*(?P<heading_value>\d{1,3}))
+      | (?P<speed>(?:SPD|SPEED)\s*(?P<speed_value>\d{1,3}))
+      | (?P<level>FL\s*(?P<level_value>\d{1,3}))
+      | (?P<land>CLEARED\s+TO\s+LAND(?:\s+(?:RWY|RUNWAY)?\s*(?P<land_runway>\d{2}[LRC]?))?)
+      | (?P<takeoff>CLEARED\s+FOR\s+TAKE-?OFF(?:\s+(?:RWY|RUNWAY)?\s*(?P<takeoff_runway>\d{2}[LRC]?))?)
+      | (?P<callsign>[A-Z]{2,3}\d{1,6}[A-Z]?)
+      | (?P<comma>,)
+      | (?P<unknown>[^\s,]+)
+    )(?=[\s,]|$)
+""", re.VERBOSE)
+
+
+class Command:
+    """Everything one aircraft was told in one group of a line.
+
+    ``heading``, ``speed`` and ``altitude`` (ft) are None when not given;
+    ``clearance`` is ``"land"``, ``"takeoff"`` or None, with its ``runway``
+    (None if a takeoff clearance did not name one).
+    """
+
+    __slots__ = ("callsign", "heading", "speed", "altitude", "clearance", "runway")
+
+    def __init__(self, callsign, heading=None, speed=None, altitude=None, clearance=None, runway=None):
+        self.callsign = callsign
+        self.heading = heading
+        self.speed = speed
+        self.altitude = altitude
+        self.clearance = clearance
+        self.runway = runway
+
+    def __eq__(self, other):
+        return isinstance(other, Command) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__
+                           if getattr(self, name) is not None)
+        return f"Command({fields})"
+
+
+def _parse_batch(text):
+    """``(commands, [])`` for one ``;``-separated batch, or ``([], errors)`` if it is malformed."""
+    commands = []
+    callsigns = []
+    clauses = {}
+    errors = []
+
+    def close_group():
+        if callsigns and not clauses:
+            errors.append(NOT_TRANSMITTED)
+        for callsign in callsigns:
+            commands.append(Command(callsign, **clauses))
+
+    for match in _TOKEN.finditer(text.rstrip()):
+        kind = match.lastgroup
+        if kind == "callsign":
+            if clauses:
+                close_group()
+                callsigns, clauses = [], {}
+            callsigns.append(match.group("callsign"))
+        elif kind == "comma":
+            continue
+        elif kind == "unknown":
+            errors.append(f"Unknown token {match.group('unknown')}")
+        elif not callsigns:
+            errors.append(f"No aircraft called for {match.group(kind)}")
+        elif kind == "heading":
+            clauses["heading"] = int(match.group("heading_value")) % 360
+        elif kind == "speed":
+            clauses["speed"] = max(MIN_SPEED_KTS, min(MAX_SPEED_KTS, int(match.group("speed_value"))))
+        elif kind == "level":
+            clauses["altitude"] = int(match.group("level_value")) * 100
+        else:
+            clauses["clearance"] = kind
+            clauses["runway"] = match.group(f"{kind}_runway")
+            if kind == "land" and clauses["runway"] is None:
+                errors.append("Landing clearance needs a runway")
+    close_group()
+    if errors:
+        return [], errors
+    return commands, []
+
+
+def parse_commands(line):
+    """Parse a whole line into ``(commands, errors)``.
+
+    ``errors`` holds one tower reply per rejected batch, in order.
+    """
+    commands = []
+    errors = []
+    for batch in line.upper().split(";"):
+        if not batch.strip():
+            continue
+        batch_commands, batch_errors = _parse_batch(batch)
+        commands.extend(batch_commands)
+        if batch_errors:
+            errors.append("; ".join(dict.fromkeys(batch_errors)))
+    if not commands and not errors:
+        errors.append(NOT_TRANSMITTED)
+    return commands, errors
@@ -0,0 +1,300 @@
+"""Batch runner for seeded headless sessions, for tuning the difficulty levels.
+
+Runs ``--sessions`` sessions per difficulty, each with its own seed and a
+scripted controller policy typing commands into the engine, spread over a
+pool of worker processes (one per CPU core by default)::
+
+    python montecarlo.py --sessions 1000 --duration 1800 --out runs.jsonl
+
+Every finished session is appended to the ``--out`` JSON lines file straight
+away.  Running the same command again skips the sessions already in the
+file, so an interrupted batch picks up where it stopped.  At the end the
+whole file is summarized per difficulty: game-over rate, landings,
+conflicts and STCA alerts per hour, and the engine's cost per tick.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+
+from simulation import FIXED_DT, PIXELS_PER_NM, SPAWN_INTERVALS, Simulation
+
+FINAL_APPROACH_NM = 5.0
+HOLD_RADIUS_NM = 10.0  # without published fixes, aircraft hold this far from the airport
+APPROACH_ALTITUDE_FT = 2500
+HOLDING_LEVELS = range(40, 140, 10)  # flight levels handed out to waiting aircraft
+LANDING_TOLERANCE = 10  # world pixels, as in Simulation.check_landing_clearance
+
+
+def bearing(source, target):
+    return math.degrees(math.atan2(target[0] - source[0], source[1] - target[1])) % 360
+
+
+class IdlePolicy:
+    """Never says anything: how the traffic plays out unattended."""
+
+    def __call__(self, sim):
+        pass
+
+
+class ApproachPolicy:
+    """Lands arrivals one at a time and holds the rest at separate levels.
+
+    The earliest spawned aircraft is the one on approach: it descends to
+    2,500 ft, flies to the final approach fix of the runway whose fix is
+    nearest, then follows the extended centreline to the entry point and is
+    cleared to land as it passes; if it misses, it goes around to the fix.
+    Every other aircraft gets the free holding level nearest its altitude and
+    flies to the nearest published fix (or towards the airport) and orbits there.
+    Headings are updated once a second, four times a second on final.
+    """
+
+    def __init__(self):
+        self.plans = {}  # callsign -> {"level": FL, "runway": label or None, "final": bool}
+
+    def _final_fix(self, sim, label):
+        entry = sim.runway_entry_points[label]
+        rad = math.radians(sim.runway_headings[label])
+        distance = FINAL_APPROACH_NM * PIXELS_PER_NM
+        return (entry[0] - math.sin(rad) * distance, entry[1] + math.cos(rad) * distance)
+
+    def _holding_point(self, sim, ac):
+        if sim.layout.fixes:
+            return min(sim.layout.fixes.values(), key=lambda fix: math.dist(ac.pos, fix))
+        center = sim.approach_target
+        rad = math.radians(bearing(center, ac.pos))
+        distance = HOLD_RADIUS_NM * PIXELS_PER_NM
+        return (center[0] + math.sin(rad) * distance, center[1] - math.cos(rad) * distance)
+
+    def _approach(self, sim, ac, plan):
+        """Commands for the aircraft on approach, or None."""
+        label = plan["runway"]
+        if label is None:
+            label = plan["runway"] = min(sim.runway_entry_points,
+                                         key=lambda label: math.dist(ac.pos, self._final_fix(sim, label)))
+        entry = sim.runway_entry_points[label]
+        rad = math.radians(sim.runway_headings[label])
+        direction = (math.sin(rad), -math.cos(rad))
+        along = (ac.pos[0] - entry[0]) * direction[0] + (ac.pos[1] - entry[1]) * direction[1]
+        if plan["final"]:
+            if math.dist(ac.pos, entry) <= LANDING_TOLERANCE:
+                return f"{ac.callsign} CLEARED TO LAND RWY{label}"
+            if along > LANDING_TOLERANCE:  # flew past the entry point: go around
+                plan["final"] = False
+            elif sim.ticks % 15 == 0:
+                # Steer for a point one mile further down the centreline
+                ahead = min(along + PIXELS_PER_NM, 0.0)
+                target = (entry[0] + direction[0] * ahead, entry[1] + direction[1] * ahead)
+                return f"{ac.callsign} HDG{round(bearing(ac.pos, target)) % 360:03d} SPD180 FL025"
+            return None
+        if sim.ticks % 60:
+            return None
+        fix = self._final_fix(sim, label)
+        if math.dist(ac.pos, fix) < PIXELS_PER_NM:
+            plan["final"] = True
+            return None
+        return f"{ac.callsign} HDG{round(bearing(ac.pos, fix)) % 360:03d} SPD220 FL025"
+
+    def _hold(self, sim, ac, plan):
+        if sim.ticks % 60:
+            return None
+        point = self._holding_point(sim, ac)
+        if math.dist(ac.pos, point) > PIXELS_PER_NM:
+            heading = bearing(ac.pos, point)
+        else:
+            heading = ac.heading_deg + 90  # keep turning: an orbit about a mile across
+        return f"{ac.callsign} HDG{round(heading) % 360:03d} SPD220 FL{plan['level']:03d}"
+
+    def __call__(self, sim):
+        if not sim.runway_entry_points:
+            return
+        for callsign in [callsign for callsign in self.plans if callsign not in sim.aircrafts]:
+            del self.plans[callsign]
+        commands = []
+        first = None
+        for ac in sim.aircrafts:
+            plan = self.plans.get(ac.callsign)
+            if plan is None:
+                taken = {plan["level"] for plan in self.plans.values()}
+                free = [level for level in HOLDING_LEVELS if level not in taken] or [HOLDING_LEVELS[-1]]
+                level = min(free, key=lambda level: abs(level * 100 - ac.altitude_ft))
+                plan = self.plans[ac.callsign] = {"level": level, "runway": None, "final": False}
+            command = self._approach(sim, ac, plan) if first is None else self._hold(sim, ac, plan)
+            first = first or ac
+            if command:
+                commands.append(command)
+        if commands:
+            sim.process_command("; ".join(commands))
+
+
+POLICIES = {"idle": IdlePolicy, "approach": ApproachPolicy}
+
+
+def job_key(job):
+    return (job["difficulty"], job["policy"], job["airport"], job["duration"], job["seed"])
+
+
+def run_session(job):
+    """Run one session to its duration (or game over) and return its result record."""
+    counts = {"STCA": 0}
+
+    def on_message(sender, text):
+        if sender in counts:
+            counts[sender] += 1
+
+    sim = Simulation({"difficulty": job["difficulty"], "Airport": job["airport"]},
+                     rng=random.Random(job["seed"]), on_message=on_message)
+    policy = POLICIES[job["policy"]]()
+    ticks = int(round(job["duration"] / FIXED_DT))
+    conflict_ticks = conflict_starts = 0
+    in_conflict = False
+    started = time.perf_counter()
+    while sim.ticks < ticks and not sim.game_over:
+        policy(sim)
+        sim.step()
+        if sim.any_conflict:
+            conflict_ticks += 1
+            conflict_starts += not in_conflict
+        in_conflict = sim.any_conflict
+    elapsed = time.perf_counter() - started
+    hours = sim.time / 3600
+    return {
+        **job,
+        "ticks": sim.ticks,
+        "simulated_s": round(sim.time, 3),
+        "game_over": sim.game_over,
+        "spawned": sim.spawned,
+        "landings": sim.landings,
+        "landings_per_hour": round(sim.landings / hours, 3) if hours else 0.0,
+        "conflicts": conflict_starts,
+        "conflict_s": round(conflict_ticks * FIXED_DT, 3),
+        "stca_alerts": counts["STCA"],
+        "tick_ms": round(elapsed * 1000 / max(sim.ticks, 1), 4),
+    }
+
+
+def load_results(path):
+    """Every complete record in a results file; a line cut short by an interrupted run is ignored."""
+    results = []
+    if not os.path.exists(path):
+        return results
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return results
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def make_jobs(difficulties, sessions, duration, policy, airport, base_seed=0):
+    return [{"difficulty": difficulty, "policy": policy, "airport": airport, "duration": duration,
+             "seed": base_seed + i}
+            for difficulty in difficulties for i in range(sessions)]
+
+
+def run_batch(jobs, out_path, workers=None, log=None):
+    """Run every job not already in ``out_path``, appending each result as it finishes.
+
+    Workers are started fresh ("spawn") rather than forked, so threads the
+    parent may be running (the asset loader, the mixer) cannot deadlock them.
+    """
+    done = {job_key(result) for result in load_results(out_path)}
+    todo = [job for job in jobs if job_key(job) not in done]
+    if log:
+        log(f"{len(jobs) - len(todo)} of {len(jobs)} sessions already in {out_path}, running {len(todo)}")
+    if not todo:
+        return 0
+    started = time.perf_counter()
+    with open(out_path, "a", encoding="utf-8") as out, multiprocessing.get_context("spawn").Pool(workers) as pool:
+        if out.tell() and not _ends_with_newline(out_path):
+            out.write("\n")  # close off a record cut short last time
+        for finished, result in enumerate(pool.imap_unordered(run_session, todo), 1):
+            out.write(json.dumps(result, separators=(",", ":")) + "\n")
+            out.flush()
+            if log:
+                elapsed = time.perf_counter() - started
+                eta = elapsed / finished * (len(todo) - finished)
+                log(f"[{finished}/{len(todo)}] {result['difficulty']:<9} seed {result['seed']:<6} "
+                    f"{'GAME OVER' if result['game_over'] else 'ok':<9} {result['landings']:>3} landed  "
+                    f"elapsed {elapsed:6.0f} s  eta {eta:6.0f} s")
+    return len(todo)
+
+
+def summarize(results):
+    """Per (difficulty, policy, airport, duration) aggregates of a list of result records."""
+    groups = {}
+    for result in results:
+        key = (result["difficulty"], result["policy"], result["airport"], result["duration"])
+        groups.setdefault(key, []).append(result)
+    summary = []
+    for (difficulty, policy, airport, duration), group in sorted(groups.items()):
+        hours = [r["simulated_s"] / 3600 for r in group]
+        ended = [r["simulated_s"] for r in group if r["game_over"]]
+        tick_ms = sorted(r["tick_ms"] for r in group)
+        summary.append({
+            "difficulty": difficulty,
+            "policy": policy,
+            "airport": airport,
+            "duration": duration,
+            "sessions": len(group),
+            "game_over_rate": round(len(ended) / len(group), 4),
+            "median_game_over_s": round(statistics.median(ended), 1) if ended else None,
+            "landings_per_hour": round(sum(r["landings"] for r in group) / sum(hours), 3),
+            "conflicts_per_hour": round(sum(r["conflicts"] for r in group) / sum(hours), 3),
+            "stca_alerts_per_hour": round(sum(r["stca_alerts"] for r in group) / sum(hours), 3),
+            "conflict_fraction": round(sum(r["conflict_s"] for r in group) / (sum(hours) * 3600), 5),
+            "tick_ms_mean": round(statistics.fmean(tick_ms), 4),
+            "tick_ms_p95": round(tick_ms[min(len(tick_ms) - 1, int(len(tick_ms) * 0.95))], 4),
+        })
+    return summary
+
+
+def format_summary(summary):
+    lines = [f"{'difficulty':<10} {'policy':<9} {'runs':>5} {'game over':>9} {'landed/h':>9} "
+             f"{'conflicts/h':>11} {'stca/h':>8} {'tick ms':>8}"]
+    for row in summary:
+        lines.append(f"{row['difficulty']:<10} {row['policy']:<9} {row['sessions']:>5} "
+                     f"{row['game_over_rate']:>9.1%} {row['landings_per_hour']:>9.2f} "
+                     f"{row['conflicts_per_hour']:>11.2f} {row['stca_alerts_per_hour']:>8.2f} "
+                     f"{row['tick_ms_mean']:>8.3f}")
+    return "\n".join(lines)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100, help="sessions per difficulty")
+    parser.add_argument("--difficulties", nargs="+", default=list(SPAWN_INTERVALS), choices=list(SPAWN_INTERVALS))
+    parser.add_argument("--duration", type=float, default=1800, help="simulated seconds per session")
+    parser.add_argument("--policy", default="approach", choices=sorted(POLICIES))
+    parser.add_argument("--airport", default="Heathrow")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first session")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU core)")
+    parser.add_argument("--out", default="montecarlo_results.jsonl", help="JSON lines file, resumed if it exists")
+    parser.add_argument("--summary", help="also write the summary to this JSON file")
+    args = parser.parse_args(argv)
+
+    jobs = make_jobs(args.difficulties, args.sessions, args.duration, args.policy, args.airport, args.seed)
+    run_batch(jobs, args.out, args.workers, log=lambda line: print(line, flush=True))
+    keys = {job_key(job) for job in jobs}
+    summary = summarize([result for result in load_results(args.out) if job_key(result) in keys])
+    print(format_summary(summary))
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
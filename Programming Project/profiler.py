@@ -0,0 +1,83 @@
+"""Per-frame timing of the radar scene, split into phases.
+
+A frame is timed with ``begin_frame``, one ``mark(phase)`` after each phase
+(the time since the previous mark is charged to it) and ``end_frame``.
+Code that times itself, like the engine's update and conflict steps, adds
+to ``current`` directly and then calls ``skip`` so the time is not charged
+twice.  The last ``history`` frames are kept for rolling averages,
+percentiles and a histogram, and every frame can also be appended to a CSV
+file for offline analysis.
+"""
+import csv
+import time
+from collections import deque
+
+PHASES = ("update", "conflict", "layers", "aircraft", "hud", "chat", "events", "flip")
+
+
+class FrameProfiler:
+    def __init__(self, history=300):
+        self.frames = deque(maxlen=history)  # (total seconds, {phase: seconds}) per frame
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.frame_count = 0
+        self._frame_start = self._mark = time.perf_counter()
+        self._csv_file = None
+        self._csv = None
+
+    def begin_frame(self):
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self._frame_start = self._mark = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.current[phase] += now - self._mark
+        self._mark = now
+
+    def skip(self):
+        """Restart the phase clock without charging anything."""
+        self._mark = time.perf_counter()
+
+    def end_frame(self):
+        total = time.perf_counter() - self._frame_start
+        self.frames.append((total, self.current))
+        self.frame_count += 1
+        if self._csv is not None:
+            self._csv.writerow([self.frame_count, f"{total * 1000:.3f}"]
+                               + [f"{self.current[phase] * 1000:.3f}" for phase in PHASES])
+
+    # --- Statistics over the kept frames (milliseconds) ---
+    def phase_means(self):
+        if not self.frames:
+            return dict.fromkeys(PHASES, 0.0)
+        count = len(self.frames)
+        return {phase: sum(phases[phase] for _, phases in self.frames) * 1000 / count for phase in PHASES}
+
+    def percentiles(self, points=(50, 95, 99)):
+        totals = sorted(total for total, _ in self.frames)
+        if not totals:
+            return dict.fromkeys(points, 0.0)
+        return {p: totals[min(len(totals) - 1, len(totals) * p // 100)] * 1000 for p in points}
+
+    def histogram(self, bins=20, max_ms=33.3):
+        """Frame counts in ``bins`` equal buckets up to ``max_ms``; the last also holds anything slower."""
+        counts = [0] * bins
+        for total, _ in self.frames:
+            counts[min(bins - 1, int(total * 1000 / max_ms * bins))] += 1
+        return counts
+
+    # --- CSV dump ---
+    @property
+    def recording(self):
+        return self._csv is not None
+
+    def start_csv(self, path):
+        self.stop_csv()
+        self._csv_file = open(path, "w", newline="", encoding="utf-8")
+        self._csv = csv.writer(self._csv_file)
+        self._csv.writerow(["frame", "total_ms"] + [f"{phase}_ms" for phase in PHASES])
+
+    def stop_csv(self):
+        if self._csv_file is not None:
+            self._csv_file.close()
+        self._csv_file = None
+        self._csv = None
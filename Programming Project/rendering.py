@@ -0,0 +1,455 @@
+"""Cached drawing layers for the radar scene.
+
+Everything here is built once and then reused across frames until whatever
+it depends on (normally zoom, window size or airport) changes.  Cached
+surfaces are converted to the display format when a display exists, so
+blitting them is a plain copy rather than a per-pixel alpha blend.
+"""
+import math
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+
+import pygame
+
+from simulation import airport_layout
+
+FONT_NAME = "arial"
+# Optional .ttf/.otf files shipped with the game, preferred over system fonts
+FONT_DIR = Path("fonts")
+RADAR_BACKGROUND = (0, 44, 66)
+RADAR_LINE_COLOR = (40, 60, 80, 150)
+
+
+def to_display_format(surface, alpha=False):
+    """Convert a surface for fast blitting, if a display mode has been set."""
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha() if alpha else surface.convert()
+
+
+class FontRegistry:
+    """Fonts resolved once per (family, size, bold) and then shared.
+
+    ``pygame.font.SysFont`` searches the system font list (fontconfig on
+    Linux) on every call, so scenes ask this registry instead.  A file in
+    ``font_dir`` named after the family (``arial.ttf``, ``arial-bold.ttf`` or
+    ``arialbd.ttf``) wins over the system font of that name.
+    """
+
+    BOLD_SUFFIXES = ("-bold", "bd", "_bold")
+    REGULAR_SUFFIXES = ("", "-regular", "_regular")
+
+    def __init__(self, font_dir=FONT_DIR):
+        self.font_dir = Path(font_dir)
+        self.fonts = {}
+        self._files = None
+
+    def _bundled_files(self):
+        if self._files is None:
+            self._files = {}
+            if self.font_dir.is_dir():
+                for path in self.font_dir.iterdir():
+                    if path.suffix.lower() in (".ttf", ".otf"):
+                        self._files[path.stem.lower()] = path
+        return self._files
+
+    def _bundled_file(self, family, bold):
+        """Path of a shipped font for ``family`` and whether it is already bold."""
+        files = self._bundled_files()
+        family = family.lower()
+        if bold:
+            for suffix in self.BOLD_SUFFIXES:
+                if family + suffix in files:
+                    return files[family + suffix], True
+        for suffix in self.REGULAR_SUFFIXES:
+            if family + suffix in files:
+                return files[family + suffix], False
+        return None, False
+
+    def get(self, family, size, bold=False):
+        key = (family.lower(), size, bold)
+        font = self.fonts.get(key)
+        if font is None:
+            path, has_bold = self._bundled_file(family, bold)
+            if path is not None:
+                font = pygame.font.Font(str(path), size)
+                if bold and not has_bold:
+                    font.set_bold(True)
+            else:
+                font = pygame.font.SysFont(family, size, bold=bold)
+            self.fonts[key] = font
+        return font
+
+    def preload(self, specs):
+        """Resolve every ``(family, size, bold)`` in ``specs`` up front."""
+        for family, size, bold in specs:
+            self.get(family, size, bold)
+
+    def clear(self):
+        self.fonts.clear()
+        self._files = None
+
+
+class LayerCache:
+    """Small LRU of prebuilt surfaces keyed by whatever they depend on."""
+
+    def __init__(self, build, max_entries=4):
+        self.build = build
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, *key):
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            return surface
+        surface = self.build(*key)
+        self.entries[key] = surface
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+
+
+def build_radar_layer(zoom, window_size, base_radius):
+    """Background fill with the range rings and crosshairs for one zoom step."""
+    layer = pygame.Surface(window_size)
+    layer.fill(RADAR_BACKGROUND)
+    # Rings are drawn translucent, so blend them over the fill once here
+    overlay = pygame.Surface(window_size, pygame.SRCALPHA)
+    center = (window_size[0] // 2, window_size[1] // 2)
+    max_radius = max(40, int(base_radius * zoom))
+    num_circles = 5
+    for i in range(1, num_circles + 1):
+        radius = max_radius * i // num_circles
+        pygame.draw.circle(overlay, RADAR_LINE_COLOR, center, radius, 2)
+    pygame.draw.line(overlay, RADAR_LINE_COLOR, (center[0], 60), (center[0], window_size[1] - 60), 1)
+    pygame.draw.line(overlay, RADAR_LINE_COLOR, (60, center[1]), (window_size[0] - 60, center[1]), 1)
+    layer.blit(overlay, (0, 0))
+    return to_display_format(layer)
+
+
+def draw_runway(surface, center_point, length, width, heading_deg, label1, label2, zoom, transform_point, label_font, color=(180, 180, 180)):
+    """Draws a runway aligned with a true heading: 0° points north (up)."""
+    rotation = 90 - heading_deg
+
+    base_surface = pygame.Surface((length, width), pygame.SRCALPHA)
+    pygame.draw.rect(base_surface, color, (0, 0, length, width))
+    pygame.draw.rect(base_surface, (255, 255, 255), (0, 0, length, width), 2)
+    runway_sprite = pygame.transform.rotozoom(base_surface, rotation, zoom)
+    center_screen = transform_point(center_point)
+    rect = runway_sprite.get_rect(center=(int(center_screen[0]), int(center_screen[1])))
+    surface.blit(runway_sprite, rect.topleft)
+
+    rad = math.radians(heading_deg)
+    dx = math.sin(rad)
+    dy = -math.cos(rad)
+    half_len = length // 2
+
+    # Threshold positions
+    end1 = (center_point[0] + dx * half_len, center_point[1] + dy * half_len)
+    end2 = (center_point[0] - dx * half_len, center_point[1] - dy * half_len)
+
+    offset = 40
+    pos1 = (end1[0] + dx * offset, end1[1] + dy * offset)
+    pos2 = (end2[0] - dx * offset, end2[1] - dy * offset)
+
+    def draw_label(text, pos):
+        text_surf = label_font.render(text, True, (255, 255, 255))
+        text_rot = pygame.transform.rotozoom(text_surf, rotation, zoom)
+        pos_screen = transform_point(pos)
+        text_rect = text_rot.get_rect(center=(int(pos_screen[0]), int(pos_screen[1])))
+        surface.blit(text_rot, text_rect)
+
+    draw_label(label1, pos1)
+    draw_label(label2, pos2)
+
+
+def build_airport_layer(airport, zoom, window_size):
+    """Runways, threshold labels and entry points (red dots) for one airport and zoom.
+
+    Returns ``(surface, topleft)``: the layer is cropped to what it actually
+    covers inside the window, so blitting it touches as few pixels as possible.
+    """
+    center = (window_size[0] / 2, window_size[1] / 2)
+
+    def transform_point(world_point):
+        return (center[0] + (world_point[0] - center[0]) * zoom,
+                center[1] + (world_point[1] - center[1]) * zoom)
+
+    layer = pygame.Surface(window_size, pygame.SRCALPHA)
+    label_font = fonts.get(FONT_NAME, 22, bold=True)
+    for runway in airport_layout(airport, (window_size[0] // 2, window_size[1] // 2)).runways:
+        label1, label2 = runway["labels"]
+        draw_runway(layer, runway["center"], runway["length"], runway["width"], runway["heading"],
+                    label1, label2, zoom, transform_point, label_font)
+        for entry in runway["entry_points"]:
+            pos = transform_point(entry)
+            pygame.draw.circle(layer, (255, 0, 0), (int(pos[0]), int(pos[1])), 5)
+    bounds = layer.get_bounding_rect()
+    cropped = layer.subsurface(bounds).copy()
+    return to_display_format(cropped, alpha=True), bounds.topleft
+
+
+class SpriteAtlas:
+    """Lazily built rotations and scalings of one sprite.
+
+    Headings are quantized to ``step_deg`` and scales to two decimals (the
+    zoom steps only produce a handful), so drawing an aircraft is a dict
+    lookup and a blit.  At most ``max_entries`` surfaces are kept; the least
+    recently used are dropped first.
+    """
+
+    def __init__(self, image, step_deg=2, max_entries=720):
+        self.image = image
+        self.step_deg = step_deg
+        self.buckets = int(round(360 / step_deg))
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, heading_deg, scale):
+        key = (int(round(heading_deg / self.step_deg)) % self.buckets, round(scale, 2))
+        sprite = self.entries.get(key)
+        if sprite is not None:
+            self.entries.move_to_end(key)
+            return sprite
+        # The source art points east, so heading 90 is unrotated
+        angle = key[0] * self.step_deg - 90
+        sprite = to_display_format(pygame.transform.rotozoom(self.image, angle, key[1]), alpha=True)
+        self.entries[key] = sprite
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return sprite
+
+
+class TextCache:
+    """LRU of rendered text surfaces keyed by (font, text, colour, antialias).
+
+    Callers must treat the returned surface as shared and read-only; anything
+    that needs to change it (alpha, for instance) should restore it after use.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.entries[key] = surface
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+
+class MessageLog:
+    """Chat lines for the radar scene, each rendered once and faded out.
+
+    Only messages still visible are kept, in a ring of at most
+    ``max_entries``; a line is dropped as soon as it has fully faded.  The
+    sender and text are composed into one surface when the message arrives,
+    so drawing a frame only changes that surface's alpha.  When
+    ``history_path`` is given every message is also appended there, which
+    is the complete record of the session.
+    """
+
+    SENDER_COLOR = (255, 230, 0)
+    TEXT_COLOR = (255, 255, 255)
+
+    def __init__(self, font, fade_seconds=8.0, max_entries=32, line_spacing=8, history_path=None):
+        self.font = font
+        self.fade_seconds = fade_seconds
+        self.line_spacing = line_spacing
+        # (timestamp, surface) pairs, oldest first
+        self.entries = deque(maxlen=max_entries)
+        self.history = open(history_path, "w", encoding="utf-8") if history_path else None
+
+    def append(self, sender, text, now=None):
+        now = time.time() if now is None else now
+        sender_surf = self.font.render(f"{sender}:", True, self.SENDER_COLOR)
+        text_surf = self.font.render(text, True, self.TEXT_COLOR)
+        gap = 8
+        line = pygame.Surface((sender_surf.get_width() + gap + text_surf.get_width(),
+                               max(sender_surf.get_height(), text_surf.get_height())), pygame.SRCALPHA)
+        line.blit(sender_surf, (0, 0))
+        line.blit(text_surf, (sender_surf.get_width() + gap, 0))
+        self.entries.append((now, to_display_format(line, alpha=True)))
+        if self.history is not None:
+            self.history.write(f"{time.strftime('%H:%M:%S', time.localtime(now))} {sender}: {text}\n")
+            self.history.flush()
+
+    def draw(self, surface, topleft, now=None):
+        """Draw the visible lines and return the rect they cover."""
+        now = time.time() if now is None else now
+        entries = self.entries
+        while entries and now - entries[0][0] >= self.fade_seconds:
+            entries.popleft()
+        x, y = topleft
+        drawn = pygame.Rect(topleft, (0, 0))
+        for timestamp, line in entries:
+            fade = (now - timestamp) / self.fade_seconds
+            line.set_alpha(max(0, 255 - int(fade * 255)))
+            drawn.union_ip(surface.blit(line, (x, y)))
+            y += line.get_height() + self.line_spacing
+        return drawn
+
+    def close(self):
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+
+
+class DirtyRects:
+    """Regions of the frame that changed since the last present.
+
+    Scenes still compose the whole frame on the back buffer (mostly cached
+    blits) but only the regions passed to ``add`` are pushed to the window
+    with ``pygame.display.update``.  Regions added in the previous frame are
+    pushed again, so whatever moved away from them is erased on screen too.
+    ``invalidate`` makes the next present a full flip, for zoom changes,
+    overlays and the first frame of a scene; so does a frame whose regions
+    would cover more than ``max_fraction`` of the window anyway.
+    """
+
+    def __init__(self, window_size, max_fraction=0.5):
+        self.screen_rect = pygame.Rect((0, 0), window_size)
+        self.max_area = window_size[0] * window_size[1] * max_fraction
+        self.rects = []
+        self.previous = []
+        self.full = True
+
+    def add(self, rect):
+        if rect:
+            self.rects.append(pygame.Rect(rect))
+
+    def invalidate(self):
+        self.full = True
+
+    def present(self):
+        """Push this frame to the window; returns True if it was a full flip."""
+        rects = [rect.clip(self.screen_rect) for rect in self.previous + self.rects]
+        rects = [rect for rect in rects if rect]
+        full = self.full or sum(rect.width * rect.height for rect in rects) > self.max_area
+        if full:
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+        self.previous = self.rects
+        self.rects = []
+        self.full = False
+        return full
+
+
+def build_profiler_overlay(profiler, font, width=280):
+    """Panel showing a ``FrameProfiler``'s phase means, frame percentiles and histogram.
+
+    Everything on it changes as the numbers move, so it is rendered straight
+    from the font rather than through the text cache; callers rebuild it a
+    few times a second and blit the result in between.
+    """
+    pad = 8
+    line_height = font.get_linesize()
+    means = profiler.phase_means()
+    percentiles = profiler.percentiles()
+    counts = profiler.histogram()
+    rows = [(phase, f"{ms:.2f} ms") for phase, ms in means.items()]
+    rows.append(("frame", "  ".join(f"p{p} {ms:.1f}" for p, ms in percentiles.items())))
+    if profiler.recording:
+        rows.append(("csv", "recording"))
+    histogram_height = 40
+    height = pad * 3 + line_height * len(rows) + histogram_height
+    panel = pygame.Surface((width, height), pygame.SRCALPHA)
+    panel.fill((0, 0, 0, 170))
+    y = pad
+    for name, value in rows:
+        panel.blit(font.render(name, True, (255, 230, 0)), (pad, y))
+        panel.blit(font.render(value, True, (255, 255, 255)), (pad + 80, y))
+        y += line_height
+    # Frame-time histogram from 0 to 33 ms; the last bar holds every slower frame
+    y += pad
+    bar_width = (width - 2 * pad) / len(counts)
+    tallest = max(counts) or 1
+    for i, count in enumerate(counts):
+        bar_height = int(histogram_height * count / tallest)
+        if not bar_height:
+            continue
+        if i < len(counts) // 2:
+            color = (80, 200, 120)
+        elif i < len(counts) - 1:
+            color = (240, 190, 60)
+        else:
+            color = (240, 80, 80)
+        pygame.draw.rect(panel, color, (pad + int(i * bar_width), y + histogram_height - bar_height,
+                                        max(1, int(bar_width) - 1), bar_height))
+    return to_display_format(panel, alpha=True)
+
+
+# Shared by every scene; each font is looked up once per process
+fonts = FontRegistry()
+# Shared by every scene; most HUD and label strings repeat frame to frame
+text_cache = TextCache()
+
+
+def render_text(font, text, color, antialias=True):
+    """Cached equivalent of ``font.render(text, antialias, color)``."""
+    return text_cache.render(font, text, color, antialias)
+
+
+def draw_aircraft(surface, ac, zoom_level, transform_point, label_font, atlas=None, selected=False):
+    """Draws one aircraft with its halo and callsign label; returns the rect it covers.
+
+    The sprite comes from ``atlas`` (a ``SpriteAtlas``); without one a plain
+    marker is drawn instead.
+    """
+    screen_vec = transform_point(ac.draw_pos)
+    pos = (int(screen_vec.x), int(screen_vec.y))
+    halo_radius = max(10, int(ac.base_pick_radius * zoom_level * 1.1))
+    if ac.conflict:
+        halo_color = (255, 60, 60)
+    elif ac.stca:
+        halo_color = (255, 150, 40)  # predicted to lose separation
+    elif selected:
+        halo_color = (255, 210, 40)
+    else:
+        halo_color = (60, 160, 245)
+    halo_alpha = 110 if not selected else 180
+    halo = pygame.Surface((halo_radius * 2, halo_radius * 2), pygame.SRCALPHA)
+    pygame.draw.circle(halo, (*halo_color, halo_alpha), (halo_radius, halo_radius), halo_radius)
+    drawn = surface.blit(halo, (pos[0] - halo_radius, pos[1] - halo_radius))
+
+    image_scale = max(0.3, min(1.5, zoom_level * 0.85))
+    if atlas is not None:
+        aircraft_sprite = atlas.get(ac.draw_heading, image_scale)
+        sprite_rect = aircraft_sprite.get_rect(center=pos)
+        drawn.union_ip(surface.blit(aircraft_sprite, sprite_rect))
+    else:
+        marker_radius = max(6, int(12 * zoom_level))
+        color = (255, 215, 0) if selected else (200, 220, 255)
+        drawn.union_ip(pygame.draw.circle(surface, color, pos, marker_radius))
+        pygame.draw.circle(surface, (255, 255, 255), pos, marker_radius, 2)
+
+    label = render_text(label_font, ac.callsign, (255, 255, 255))
+    label_rect = label.get_rect(midtop=(pos[0], pos[1] + int(14 * zoom_level)))
+    drawn.union_ip(surface.blit(label, label_rect))
+    return drawn
+
+
+# One full-window layer per recently used zoom step
+radar_layers = LayerCache(build_radar_layer)
+# One cropped airport layout per recently used (airport, zoom)
+airport_layers = LayerCache(build_airport_layer)
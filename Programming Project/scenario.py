@@ -0,0 +1,121 @@
+"""Seeded sessions that can be recorded and replayed exactly.
+
+A ``Scenario`` is everything that decides how a session unfolds: the RNG
+seed, the settings, the window and pick sizes, and every input (typed
+command or zoom change) stamped with the tick it arrived before.  Given
+those, the engine is deterministic, so a replay reproduces the original
+session bit for bit, either headless and as fast as possible (``replay``)
+or driven by the game loop in real time (``replay_simulation``).
+
+Scenarios are saved as JSON, gzipped when the file name ends in ``.gz``.
+From the command line, ``python scenario.py FILE`` replays one headlessly.
+"""
+import gzip
+import json
+import random
+import sys
+import time
+from collections import deque
+
+from simulation import MAX_AIRCRAFT, WINDOW_SIZE, Simulation
+
+FORMAT_VERSION = 1
+
+
+def _open(path, mode):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Scenario:
+    """The seed, settings and timed inputs of one session."""
+
+    def __init__(self, seed, settings=None, window_size=WINDOW_SIZE, pick_radius=20, max_aircraft=MAX_AIRCRAFT,
+                 inputs=None, ticks=0):
+        self.seed = seed
+        self.settings = dict(settings or {})
+        self.window_size = tuple(window_size)
+        self.pick_radius = pick_radius
+        self.max_aircraft = max_aircraft
+        self.inputs = [tuple(event) for event in inputs or []]
+        self.ticks = ticks
+        self.simulation = None
+
+    @classmethod
+    def new(cls, settings=None, seed=None, **kwargs):
+        """A fresh scenario with a random seed unless one is given."""
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+        return cls(seed, settings, **kwargs)
+
+    def _create(self, on_message):
+        return Simulation(self.settings, self.window_size, rng=random.Random(self.seed), on_message=on_message,
+                          pick_radius=self.pick_radius, max_aircraft=self.max_aircraft)
+
+    def record(self, on_message=None):
+        """Start the session, logging every input into this scenario."""
+        self.inputs = []
+        self.simulation = self._create(on_message)
+        self.simulation.input_log = self.inputs
+        return self.simulation
+
+    def replay_simulation(self, on_message=None):
+        """A session that feeds the recorded inputs back in as it is stepped."""
+        sim = self._create(on_message)
+        sim.script = deque(self.inputs)
+        return sim
+
+    def replay(self, on_message=None):
+        """Re-run the whole recording headlessly and return the finished session."""
+        sim = self.replay_simulation(on_message)
+        while sim.ticks < self.ticks and not sim.game_over:
+            sim.step()
+        return sim
+
+    def to_dict(self):
+        if self.simulation is not None:
+            self.ticks = self.simulation.ticks
+        return {
+            "version": FORMAT_VERSION,
+            "seed": self.seed,
+            "settings": self.settings,
+            "window_size": list(self.window_size),
+            "pick_radius": self.pick_radius,
+            "max_aircraft": self.max_aircraft,
+            "ticks": self.ticks,
+            "inputs": [list(event) for event in self.inputs],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported scenario version {data.get('version')!r}")
+        return cls(data["seed"], data["settings"], data["window_size"], data["pick_radius"], data["max_aircraft"],
+                   data["inputs"], data["ticks"])
+
+    def save(self, path):
+        with _open(path, "w") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        with _open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+
+def main(argv):
+    if len(argv) != 1:
+        print("usage: python scenario.py SCENARIO_FILE")
+        return 2
+    scenario = Scenario.load(argv[0])
+    started = time.perf_counter()
+    sim = scenario.replay()
+    elapsed = time.perf_counter() - started
+    print(f"Replayed {sim.ticks} ticks ({sim.time:.1f} s simulated) in {elapsed:.2f} s: "
+          f"{len(sim.aircrafts)} aircraft, {'game over' if sim.game_over else 'no collision'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,995 @@
+"""Headless air traffic simulation engine.
+
+Everything in here is plain Python with no pygame display, font or mixer
+dependency, so a session can be stepped thousands of times faster than real
+time.  The pygame front end in ``Main.py`` only renders the state held by a
+``Simulation`` and feeds typed commands back into it.
+
+World coordinates are the radar scope's pixels at zoom 1.0, with the airport
+in the middle of the window.
+"""
+import functools
+import math
+import random
+import time
+from collections import deque
+
+import numpy as np
+
+from airports import find_airport
+from commands import parse_commands
+
+WINDOW_SIZE = (1280, 832)
+ZOOM_MIN = 0.2
+
+# Approximate physical scale: 5000 m runway spans ~300 px on screen
+METERS_PER_PIXEL = 5000 / 300
+PIXELS_PER_METER = 1 / METERS_PER_PIXEL
+PIXELS_PER_SECOND_PER_KNOT = 0.514444 * PIXELS_PER_METER
+PIXELS_PER_NM = 1852 * PIXELS_PER_METER
+
+# The simulation always advances in steps of FIXED_DT simulated seconds,
+# whatever the render frame rate or time scale.  A single frame may run at
+# most MAX_STEPS_PER_FRAME steps; any backlog beyond that is dropped.
+FIXED_DT = 1 / 60
+MAX_STEPS_PER_FRAME = 240
+
+MAX_AIRCRAFT = 10
+# Separation minima: closer than this both ways is a conflict
+CONFLICT_DISTANCE_NM = 2.5
+CONFLICT_ALTITUDE_FT = 1000
+# Short-term conflict alert: every STCA_INTERVAL_S each pair's straight-line
+# tracks are projected STCA_HORIZON_S ahead and checked against the minima
+STCA_HORIZON_S = 120.0
+STCA_INTERVAL_S = 1.0
+STCA_WINDOWS = 4
+AIRLINE_CODES = ["BA", "QR", "LH", "EK", "AF", "DL", "VS", "QF", "KL", "TK"]
+AIRCRAFT_TYPES = ["A320-251NX", "B777-300ER", "A380-800", "B787-8", "A350-900", "A321-200", "A330-800", "A220-200"]
+
+# Seconds between spawns for each difficulty
+SPAWN_INTERVALS = {
+    "Beginner": (28.0, 36.0),
+    "Easy": (14.0, 20.0),
+    "Normal": (9.0, 16.0),
+    "Realistic": (5.0, 10.0),
+}
+
+
+def offset_perpendicular(base_center, heading_deg, distance):
+    """Offset a point sideways from a heading (positive is left of the heading)."""
+    rad = math.radians(heading_deg)
+    px = -math.cos(rad)
+    py = -math.sin(rad)
+    return (base_center[0] + px * distance, base_center[1] + py * distance)
+
+
+def get_entry_points(center_point, length, heading_deg, distance_m=5000):
+    """Entry points ``distance_m`` (5 km) out from each runway threshold along the runway heading."""
+    entry_dist_px = distance_m * PIXELS_PER_METER
+    rad = math.radians(heading_deg)
+    dx = math.sin(rad)
+    dy = -math.cos(rad)
+    half_len = length // 2
+    end1 = (center_point[0] + dx * half_len, center_point[1] + dy * half_len)
+    end2 = (center_point[0] - dx * half_len, center_point[1] - dy * half_len)
+    entry1 = (end1[0] + dx * entry_dist_px, end1[1] + dy * entry_dist_px)
+    entry2 = (end2[0] - dx * entry_dist_px, end2[1] - dy * entry_dist_px)
+    return [entry1, entry2]
+
+
+class AirportLayout:
+    """An airport's runways, entry points and fixes in world coordinates.
+
+    ``runways`` is a list of dicts with a world ``center``, ``length``,
+    ``width``, ``heading``, the two threshold ``labels`` (the first one lands
+    on ``heading``) and the matching two ``entry_points``.  ``entry_points``
+    and ``headings`` map each runway label to its entry point and landing
+    heading; ``fixes`` maps fix names to world positions.
+    """
+
+    def __init__(self, name, runways=(), fixes=None):
+        self.name = name
+        self.runways = list(runways)
+        self.entry_points = {}
+        self.headings = {}
+        for runway in self.runways:
+            label1, label2 = runway["labels"]
+            entry1, entry2 = runway["entry_points"]
+            self.entry_points[label1] = entry1
+            self.headings[label1] = runway["heading"]
+            self.entry_points[label2] = entry2
+            self.headings[label2] = (runway["heading"] + 180) % 360
+        self.fixes = fixes or {}
+
+
+@functools.lru_cache(maxsize=None)
+def airport_layout(airport, center):
+    """World geometry for the airport named ``airport`` centred on ``center``.
+
+    Built once per (airport, center) and shared, so treat it as read-only.
+    Unknown airports get an empty layout.
+    """
+    spec = find_airport(airport)
+    if spec is None:
+        return AirportLayout(airport)
+    runways = []
+    for runway in spec["runways"]:
+        heading = runway["heading"]
+        runway_center = offset_perpendicular(center, heading, runway["offset"])
+        runways.append({
+            "center": runway_center,
+            "length": runway["length"],
+            "width": runway["width"],
+            "heading": heading,
+            "labels": runway["labels"],
+            "entry_points": get_entry_points(runway_center, runway["length"], heading, runway["entry_distance_m"]),
+        })
+    fixes = {}
+    for name, fix in spec["fixes"].items():
+        rad = math.radians(fix["bearing"])
+        distance = fix["distance_nm"] * PIXELS_PER_NM
+        fixes[name] = (center[0] + math.sin(rad) * distance, center[1] - math.cos(rad) * distance)
+    return AirportLayout(spec["name"], runways, fixes)
+
+
+def compute_world_bounds(window_size, min_zoom=ZOOM_MIN, margin=200):
+    """Airspace rectangle (left, top, width, height) covering the most zoomed-out view."""
+    cx, cy = window_size[0] / 2, window_size[1] / 2
+    max_view_factor = 1.0 / min_zoom
+    left = cx - cx * max_view_factor
+    right = cx + (window_size[0] - cx) * max_view_factor
+    top = cy - cy * max_view_factor
+    bottom = cy + (window_size[1] - cy) * max_view_factor
+    return (left - margin, top - margin, (right - left) + 2 * margin, (bottom - top) + 2 * margin)
+
+
+class AircraftStore:
+    """Struct-of-arrays state for every live aircraft.
+
+    Each aircraft owns one slot (row) in a set of contiguous NumPy arrays so a
+    whole tick of traffic is integrated by ``update`` in a handful of array
+    operations.  Slots are kept packed: removing an aircraft moves the last
+    one into its slot.
+    """
+
+    def __init__(self, capacity=16):
+        self.count = 0
+        self.revision = 0  # bumped on every change, so derived indexes know when to rebuild
+        self.alpha = 1.0  # how far rendering is between the previous and current state
+        self.owners = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = self.count
+        self.capacity = capacity
+
+        def grow(name, shape, dtype=np.float64):
+            array = np.zeros(shape, dtype=dtype)
+            if old:
+                array[:old] = getattr(self, name)[:old]
+            setattr(self, name, array)
+
+        grow("pos", (capacity, 2))
+        grow("prev_pos", (capacity, 2))
+        grow("heading", capacity)
+        grow("prev_heading", capacity)
+        grow("dir_x", capacity, np.float32)
+        grow("dir_y", capacity, np.float32)
+        grow("target_heading", capacity)
+        grow("speed", capacity)
+        grow("target_speed", capacity)
+        grow("altitude", capacity)
+        grow("target_altitude", capacity)
+        grow("turn_rate", capacity)
+        grow("accel", capacity)
+        grow("climb_rate", capacity)
+        grow("distance", capacity)
+        grow("conflict", capacity, bool)
+        grow("stca", capacity, bool)
+        # Scratch space for update(), never read between ticks
+        self._scratch = [np.empty(capacity) for _ in range(3)]
+        self._mask = np.empty(capacity, dtype=bool)
+        self._rad32 = np.empty(capacity, dtype=np.float32)
+
+    def add(self, owner, position, heading, speed, altitude, target):
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+        i = self.count
+        self.pos[i] = self.prev_pos[i] = position
+        self.heading[i] = self.prev_heading[i] = self.target_heading[i] = heading
+        rad = math.radians(heading)
+        self.dir_x[i] = math.sin(rad)
+        self.dir_y[i] = -math.cos(rad)
+        self.speed[i] = self.target_speed[i] = speed
+        self.altitude[i] = self.target_altitude[i] = altitude
+        self.turn_rate[i] = 2.5  # deg per second
+        self.accel[i] = 3.0  # knots per second
+        self.climb_rate[i] = 1500 / 60.0  # feet per second (~1500 fpm)
+        self.distance[i] = math.hypot(target[0] - position[0], target[1] - position[1])
+        self.conflict[i] = False
+        self.stca[i] = False
+        self.owners.append(owner)
+        self.count += 1
+        self.revision += 1
+        return i
+
+    def remove(self, slot):
+        """Free a slot by moving the last aircraft into it."""
+        last = self.count - 1
+        if slot != last:
+            for array in (self.pos, self.prev_pos, self.heading, self.prev_heading, self.dir_x, self.dir_y, self.target_heading, self.speed, self.target_speed,
+                          self.altitude, self.target_altitude, self.turn_rate, self.accel,
+                          self.climb_rate, self.distance, self.conflict, self.stca):
+                array[slot] = array[last]
+            moved = self.owners[last]
+            self.owners[slot] = moved
+            moved.slot = slot
+        self.owners.pop()
+        self.count = last
+        self.revision += 1
+
+    def update(self, dt, target):
+        """Turn, accelerate, climb and move every aircraft by ``dt`` seconds.
+
+        Everything is done in place on preallocated scratch arrays, so a tick
+        allocates nothing however many aircraft are being commanded.
+        """
+        n = self.count
+        if n == 0:
+            return
+        self.revision += 1
+        np.copyto(self.prev_pos[:n], self.pos[:n])
+        np.copyto(self.prev_heading[:n], self.heading[:n])
+        s1, s2, s3 = self._scratch[0][:n], self._scratch[1][:n], self._scratch[2][:n]
+        mask = self._mask[:n]
+
+        # Adjust heading gradually.  Headings are kept in [0, 360) so the
+        # shortest turn can be wrapped with compares instead of a float modulo.
+        heading = self.heading[:n]
+        target_heading = self.target_heading[:n]
+        diff = np.subtract(target_heading, heading, out=s1)
+        if diff.any():
+            np.subtract(diff, 360.0, out=diff, where=np.greater_equal(diff, 180.0, out=mask))
+            np.add(diff, 360.0, out=diff, where=np.less(diff, -180.0, out=mask))
+            limit = np.multiply(self.turn_rate[:n], dt, out=s2)
+            np.greater(np.abs(diff, out=s3), limit, out=mask)  # still short of the target
+            turned = np.add(heading, np.copysign(limit, diff, out=limit), out=s3)
+            np.copyto(heading, target_heading)
+            np.copyto(heading, turned, where=mask)
+            np.subtract(heading, 360.0, out=heading, where=np.greater_equal(heading, 360.0, out=mask))
+            np.add(heading, 360.0, out=heading, where=np.less(heading, 0.0, out=mask))
+            # Unit direction vectors are fine in float32, where trig is much cheaper
+            rad = np.multiply(heading, math.pi / 180, out=self._rad32[:n], casting="same_kind")
+            np.sin(rad, out=self.dir_x[:n])
+            np.negative(np.cos(rad, out=self.dir_y[:n]), out=self.dir_y[:n])
+
+        # Adjust speed and altitude gradually
+        for value, wanted, rate in ((self.speed[:n], self.target_speed[:n], self.accel[:n]),
+                                    (self.altitude[:n], self.target_altitude[:n], self.climb_rate[:n])):
+            diff = np.subtract(wanted, value, out=s1)
+            if not diff.any():
+                continue
+            max_change = np.multiply(rate, dt, out=s2)
+            np.greater(np.abs(diff, out=s3), max_change, out=mask)
+            slewed = np.add(value, np.copysign(max_change, diff, out=max_change), out=s3)
+            np.copyto(value, wanted)
+            np.copyto(value, slewed, where=mask)
+
+        pos = self.pos[:n]
+        step = np.multiply(self.speed[:n], PIXELS_PER_SECOND_PER_KNOT * dt, out=s1)
+        pos[:, 0] += np.multiply(self.dir_x[:n], step, out=s2)
+        pos[:, 1] += np.multiply(self.dir_y[:n], step, out=s2)
+        dx = np.subtract(target[0], pos[:, 0], out=s2)
+        dy = np.subtract(target[1], pos[:, 1], out=s3)
+        np.add(np.multiply(dx, dx, out=dx), np.multiply(dy, dy, out=dy), out=s1)
+        np.sqrt(s1, out=self.distance[:n])
+
+
+class SpatialHash:
+    """Uniform grid over the airspace, bucketed by altitude band.
+
+    Cells are ``cell_size`` world units square and ``band_ft`` feet deep, so any
+    two aircraft closer than one cell horizontally and one band vertically are
+    always in the same or neighbouring buckets.  The grid is rebuilt from the
+    store arrays once per tick and then shared by every proximity query.
+    """
+
+    # Cell coordinates are packed into a single int64 key; each field is
+    # biased so a neighbour offset never carries into the next field.
+    _BIAS = 1 << 19
+    _SPAN = 1 << 20
+
+    def __init__(self, cell_size, band_ft=1000):
+        self.cell_size = float(cell_size)
+        self.band_ft = float(band_ft)
+        self.count = 0
+        self.order = np.empty(0, dtype=np.int64)
+        self.cell_keys = np.empty(0, dtype=np.int64)
+        self.cell_starts = np.empty(0, dtype=np.int64)
+        self.cell_ends = np.empty(0, dtype=np.int64)
+        self.point_keys = np.empty(0, dtype=np.int64)
+        self.point_rank = np.empty(0, dtype=np.int64)
+
+    def _pack(self, cx, cy, band):
+        return ((cx + self._BIAS) * self._SPAN + (cy + self._BIAS)) * self._SPAN + (band + self._BIAS)
+
+    def rebuild(self, pos, altitude, count):
+        """Bucket the first ``count`` aircraft of the store arrays."""
+        self.count = count
+        cx = np.floor(pos[:count, 0] / self.cell_size).astype(np.int64)
+        cy = np.floor(pos[:count, 1] / self.cell_size).astype(np.int64)
+        band = np.floor(altitude[:count] / self.band_ft).astype(np.int64)
+        keys = self._pack(cx, cy, band)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        cell_keys, cell_starts, cell_counts = np.unique(sorted_keys, return_index=True, return_counts=True)
+        self.order = order
+        self.cell_keys = cell_keys
+        self.cell_starts = cell_starts
+        self.cell_ends = cell_starts + cell_counts
+        self.point_keys = sorted_keys
+        self.point_rank = np.arange(count)
+
+    def _expand(self, firsts, lasts, owners):
+        """Pair each ``owners[k]`` with every sorted position in [firsts[k], lasts[k])."""
+        lengths = lasts - firsts
+        keep = lengths > 0
+        firsts, lengths, owners = firsts[keep], lengths[keep], owners[keep]
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        left = np.repeat(owners, lengths)
+        offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        right = np.repeat(firsts, lengths) + offsets
+        return self.order[left], self.order[right]
+
+    def candidate_pairs(self):
+        """Slot index arrays (a, b) of every pair sharing or neighbouring a bucket.
+
+        Each unordered pair appears once; callers still apply the exact
+        distance and altitude tests.
+        """
+        if self.count < 2:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        keys = self.point_keys
+        rank = self.point_rank
+        cell_index = np.searchsorted(self.cell_keys, keys)
+        # Same bucket: everything sorted after this aircraft in its own cell
+        pairs_a, pairs_b = [], []
+        a, b = self._expand(rank + 1, self.cell_ends[cell_index], rank)
+        pairs_a.append(a)
+        pairs_b.append(b)
+        # The 13 "forward" neighbours, so each bucket pair is visited once
+        span = self._SPAN
+        for dx in (0, 1):
+            for dy in (-1, 0, 1):
+                for db in (-1, 0, 1):
+                    if (dx, dy, db) <= (0, 0, 0):
+                        continue
+                    neighbour = keys + (dx * span + dy) * span + db
+                    index = np.searchsorted(self.cell_keys, neighbour)
+                    index = np.minimum(index, len(self.cell_keys) - 1)
+                    found = self.cell_keys[index] == neighbour
+                    if not found.any():
+                        continue
+                    a, b = self._expand(self.cell_starts[index[found]], self.cell_ends[index[found]], rank[found])
+                    pairs_a.append(a)
+                    pairs_b.append(b)
+        return np.concatenate(pairs_a), np.concatenate(pairs_b)
+
+    def query_point(self, x, y):
+        """Slots of aircraft at any altitude in the 3x3 cells around a world point."""
+        if self.count == 0:
+            return np.empty(0, dtype=np.int64)
+        cx = int(math.floor(x / self.cell_size))
+        cy = int(math.floor(y / self.cell_size))
+        found = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                # All bands of one column are contiguous in key order
+                low = self._pack(cx + dx, cy + dy, -self._BIAS)
+                first = np.searchsorted(self.point_keys, low)
+                last = np.searchsorted(self.point_keys, low + self._SPAN)
+                if last > first:
+                    found.append(self.order[first:last])
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(found)
+
+
+class Aircraft:
+    """Handle to one aircraft whose numeric state lives in an ``AircraftStore``."""
+
+    def __init__(self, store, position, target, callsign, aircraft_type, speed_knots, altitude_ft, pick_radius=20, seq=0):
+        self.store = store
+        self.seq = seq  # spawn order; later aircraft are drawn on top
+        self.callsign = callsign
+        self.aircraft_type = aircraft_type
+        self.base_pick_radius = pick_radius
+        dx = target[0] - position[0]
+        dy = target[1] - position[1]
+        if dx == 0 and dy == 0:
+            dx, dy = 0.0, 1.0
+        heading = (math.degrees(math.atan2(dx, -dy)) + 360) % 360
+        self.slot = store.add(self, (float(position[0]), float(position[1])), heading,
+                              float(speed_knots), float(altitude_ft), target)
+
+    @property
+    def pos(self):
+        x, y = self.store.pos[self.slot]
+        return (float(x), float(y))
+
+    @property
+    def heading_deg(self):
+        return float(self.store.heading[self.slot])
+
+    @property
+    def draw_pos(self):
+        """Position to render, interpolated between the last two fixed steps."""
+        store = self.store
+        px, py = store.prev_pos[self.slot]
+        x, y = store.pos[self.slot]
+        alpha = store.alpha
+        return (float(px + (x - px) * alpha), float(py + (y - py) * alpha))
+
+    @property
+    def draw_heading(self):
+        """Heading to render, interpolated the short way round."""
+        store = self.store
+        previous = float(store.prev_heading[self.slot])
+        diff = (float(store.heading[self.slot]) - previous + 540) % 360 - 180
+        return (previous + diff * store.alpha) % 360
+
+    @property
+    def speed_knots(self):
+        return float(self.store.speed[self.slot])
+
+    @property
+    def altitude_ft(self):
+        return float(self.store.altitude[self.slot])
+
+    @property
+    def target_heading(self):
+        return float(self.store.target_heading[self.slot])
+
+    @property
+    def target_speed(self):
+        return float(self.store.target_speed[self.slot])
+
+    @property
+    def target_altitude(self):
+        return float(self.store.target_altitude[self.slot])
+
+    @property
+    def distance_to_target(self):
+        return float(self.store.distance[self.slot])
+
+    @property
+    def range_nm(self):
+        return self.distance_to_target / PIXELS_PER_NM
+
+    @property
+    def conflict(self):
+        return bool(self.store.conflict[self.slot])
+
+    @property
+    def stca(self):
+        """True while the short-term conflict alert predicts a loss of separation."""
+        return bool(self.store.stca[self.slot])
+
+    def apply_command(self, heading=None, speed=None, altitude=None):
+        if heading is not None:
+            self.store.target_heading[self.slot] = heading % 360
+        if speed is not None:
+            self.store.target_speed[self.slot] = float(speed)
+        if altitude is not None:
+            self.store.target_altitude[self.slot] = float(altitude)
+
+    def info_lines(self):
+        return [
+            f"Callsign: {self.callsign}",
+            f"Type: {self.aircraft_type}",
+            f"Speed: {int(self.speed_knots)} kts",
+            f"Altitude: {int(self.altitude_ft)} ft",
+            f"Heading: {int(self.heading_deg)}° | Range: {self.range_nm:.1f} NM",
+        ]
+
+
+class AircraftRegistry:
+    """The live aircraft of a session, indexed by callsign.
+
+    Lookup, insertion and removal are constant time and callsigns are
+    matched case-insensitively.  Iteration is in spawn order, which a
+    removal never disturbs; the packed per-aircraft arrays behind it
+    are compacted by ``AircraftStore.remove`` with a swap instead.
+    """
+
+    def __init__(self):
+        self._by_callsign = {}
+
+    def __len__(self):
+        return len(self._by_callsign)
+
+    def __iter__(self):
+        return iter(self._by_callsign.values())
+
+    def __contains__(self, item):
+        if isinstance(item, str):
+            return item.upper() in self._by_callsign
+        return self._by_callsign.get(item.callsign.upper()) is item
+
+    def get(self, callsign):
+        return self._by_callsign.get(callsign.upper())
+
+    def add(self, aircraft):
+        key = aircraft.callsign.upper()
+        if key in self._by_callsign:
+            raise ValueError(f"callsign {aircraft.callsign} is already in use")
+        self._by_callsign[key] = aircraft
+
+    def remove(self, aircraft):
+        del self._by_callsign[aircraft.callsign.upper()]
+
+
+class Simulation:
+    """One radar session: spawning, aircraft movement, commands and conflicts.
+
+    ``zoom`` is the scope zoom the session is being viewed at.  New traffic
+    appears at the edge of that view and the game-over halo check is sized to
+    it, exactly as in the interactive game; headless runs keep the default.
+    ``on_message(sender, text)`` receives every radio/tower message.
+    """
+
+    def __init__(self, settings=None, window_size=WINDOW_SIZE, rng=None, on_message=None, pick_radius=20,
+                 max_aircraft=MAX_AIRCRAFT):
+        settings = settings or {}
+        self.difficulty = settings.get("difficulty", "Normal")
+        self.airport = settings.get("Airport", "Heathrow")
+        self.window_size = window_size
+        self.rng = rng or random.Random()
+        self.on_message = on_message
+        self.pick_radius = pick_radius
+        self.max_aircraft = max_aircraft
+        self.zoom = ZOOM_MIN
+
+        self.screen_center = (window_size[0] / 2, window_size[1] / 2)
+        self.approach_target = (self.screen_center[0], self.screen_center[1] - 20)
+        self.world_bounds = compute_world_bounds(window_size)
+
+        self.layout = airport_layout(self.airport, (window_size[0] // 2, window_size[1] // 2))
+        self.runways = self.layout.runways
+        self.runway_entry_points = self.layout.entry_points
+        self.runway_headings = self.layout.headings
+
+        self.store = AircraftStore()
+        self.broadphase = SpatialHash(CONFLICT_DISTANCE_NM * PIXELS_PER_NM, CONFLICT_ALTITUDE_FT)
+        self._broadphase_key = None
+        self._pairs_key = None
+        self._pairs = None
+        # Separate grid for the lookahead, bucketed on where each track is halfway through the horizon
+        self.stca_broadphase = SpatialHash(CONFLICT_DISTANCE_NM * PIXELS_PER_NM, CONFLICT_ALTITUDE_FT)
+        self.stca_horizon = STCA_HORIZON_S
+        self.stca_interval_ticks = max(1, int(round(STCA_INTERVAL_S / FIXED_DT)))
+        # (aircraft, aircraft, seconds to loss of separation, NM at closest approach) per alert
+        self.stca_alerts = []
+        self._stca_keys = np.empty(0, dtype=np.int64)  # spawn-order pair keys of the last alerts
+        self._spawn_count = 0
+        self.aircrafts = AircraftRegistry()
+        # Parsed commands waiting for the next tick, oldest first
+        self.command_queue = deque()
+        # Replay support (see scenario.py): when input_log is a list every
+        # command and zoom change is appended to it as (tick, kind, value);
+        # inputs in script are fed back in at their tick.
+        self.input_log = None
+        self._logged_zoom = None
+        self.script = deque()
+        # When a dict (see profiler.py), each step adds the seconds spent moving
+        # traffic to "update" and checking separation to "conflict"
+        self.phase_times = None
+        self.time = 0.0
+        self.ticks = 0
+        self.accumulator = 0.0
+        self.spawn_timer = 0.0
+        self.next_spawn_time = self._roll_spawn_interval()
+        self.any_conflict = False
+        self.game_over = False
+        self.landings = 0
+
+    # --- Messages ---
+    def append_message(self, sender, text):
+        if self.on_message:
+            self.on_message(sender, text)
+
+    # --- Spawning ---
+    def _roll_spawn_interval(self):
+        low, high = SPAWN_INTERVALS.get(self.difficulty, SPAWN_INTERVALS["Normal"])
+        return self.rng.uniform(low, high)
+
+    def screen_to_world(self, point):
+        zoom = max(self.zoom, 0.001)
+        return (
+            self.screen_center[0] + (point[0] - self.screen_center[0]) / zoom,
+            self.screen_center[1] + (point[1] - self.screen_center[1]) / zoom,
+        )
+
+    def generate_callsign(self):
+        """A callsign no live aircraft has; numbers get a digit longer if three get crowded."""
+        digits = 3
+        while True:
+            for _ in range(16):
+                callsign = f"{self.rng.choice(AIRLINE_CODES)}{self.rng.randint(10 ** (digits - 1), 10 ** digits - 1)}"
+                if callsign not in self.aircrafts:
+                    return callsign
+            digits += 1
+
+    def spawn_aircraft(self):
+        if self.game_over:
+            return None
+        rng = self.rng
+        width, height = self.window_size
+        edge_name = rng.choice(["left", "right", "top", "bottom"])
+        if edge_name == "left":
+            spawn_pos = self.screen_to_world((0.0, rng.uniform(0.0, height)))
+        elif edge_name == "right":
+            spawn_pos = self.screen_to_world((float(width), rng.uniform(0.0, height)))
+        elif edge_name == "top":
+            spawn_pos = self.screen_to_world((rng.uniform(0.0, width), 0.0))
+        else:
+            spawn_pos = self.screen_to_world((rng.uniform(0.0, width), float(height)))
+        callsign = self.generate_callsign()
+        ac_type = rng.choice(AIRCRAFT_TYPES)
+        speed = rng.randint(160, 230)
+        altitude = rng.randint(4200, 9500)
+        aircraft = Aircraft(self.store, spawn_pos, self.approach_target, callsign, ac_type, speed, altitude,
+                            self.pick_radius, seq=self._spawn_count)
+        self._spawn_count += 1
+        self.aircrafts.add(aircraft)
+        self.append_message(
+            callsign,
+            f"{callsign} {ac_type} inbound {edge_name}, {speed} kts, {altitude} ft, {aircraft.range_nm:.1f} NM",
+        )
+        self.spawn_timer = 0.0
+        self.next_spawn_time = self._roll_spawn_interval()
+        return aircraft
+
+    @property
+    def spawned(self):
+        """How many aircraft have spawned this session."""
+        return self._spawn_count
+
+    def find_aircraft(self, callsign: str):
+        return self.aircrafts.get(callsign)
+
+    def remove_aircraft(self, aircraft):
+        if aircraft in self.aircrafts:
+            self.aircrafts.remove(aircraft)
+            self.store.remove(aircraft.slot)
+
+    # --- Commands ---
+    def check_landing_clearance(self, ac, entry_point, runway_heading):
+        if math.hypot(ac.pos[0] - entry_point[0], ac.pos[1] - entry_point[1]) > 10:
+            return False, "Not at entry point"
+        diff = (ac.heading_deg - runway_heading + 540) % 360 - 180
+        if abs(diff) > 20:
+            return False, "Not aligned with runway"
+        if not (2000 <= ac.altitude_ft <= 3000):
+            return False, "Not at landing altitude (FL20–30)"
+        return True, "Clear to land"
+
+    def process_command(self, command: str):
+        """Parse a typed line and queue its commands for the next tick.
+
+        Syntax errors are answered straight away; everything else (unknown
+        callsigns, clearances) is answered when the command is applied.
+        Returns the number of commands queued.
+        """
+        if self.input_log is not None:
+            self.input_log.append((self.ticks, "command", command))
+        commands, errors = parse_commands(command)
+        for error in errors:
+            self.append_message("Tower", error)
+        self.command_queue.extend(commands)
+        return len(commands)
+
+    def apply_queued_commands(self):
+        queue = self.command_queue
+        while queue:
+            self.execute_command(queue.popleft())
+
+    def execute_command(self, command):
+        aircraft = self.find_aircraft(command.callsign)
+        if aircraft is None:
+            self.append_message("Tower", f"Unknown aircraft {command.callsign}.")
+            return
+        heading, speed, altitude = command.heading, command.speed, command.altitude
+        if heading is not None or speed is not None or altitude is not None:
+            aircraft.apply_command(heading=heading, speed=speed, altitude=altitude)
+            parts = []
+            if heading is not None:
+                parts.append(f"turning HDG {heading:03d}")
+            if speed is not None:
+                parts.append(f"speed {speed} kts")
+            if altitude is not None:
+                parts.append(f"altitude {altitude} ft")
+            reply = ", ".join(parts)
+            self.append_message(aircraft.callsign, reply[0].upper() + reply[1:])
+        if command.clearance == "land":
+            self.clear_to_land(aircraft, command.runway)
+        elif command.clearance == "takeoff":
+            if command.runway is not None and command.runway not in self.runway_entry_points:
+                self.append_message("Tower", f"Runway {command.runway} not available")
+            else:
+                # Every aircraft in this mode is an inbound arrival
+                self.append_message("Tower", f"Takeoff clearance denied: {aircraft.callsign} is already airborne")
+
+    def clear_to_land(self, aircraft, rw_label):
+        if rw_label not in self.runway_entry_points:
+            self.append_message("Tower", f"Runway {rw_label} not available")
+            return
+        entry_point = self.runway_entry_points[rw_label]
+        runway_heading = self.runway_headings[rw_label]
+        ok, reason = self.check_landing_clearance(aircraft, entry_point, runway_heading)
+        if ok:
+            self.append_message(aircraft.callsign, f"{aircraft.callsign} landing clearance acknowledged runway {rw_label}")
+            self.remove_aircraft(aircraft)
+            self.landings += 1
+            self.append_message(aircraft.callsign, f"{aircraft.callsign} landed successfully.")
+        else:
+            self.append_message("Tower", f"Landing clearance denied: {reason}")
+
+    # --- Per-tick update ---
+    def advance(self, frame_dt):
+        """Advance by ``frame_dt`` simulated seconds of wall time in FIXED_DT steps.
+
+        Leftover time is carried to the next frame and sets ``store.alpha`` so
+        the renderer can interpolate between the last two states.  Returns the
+        number of steps taken.
+        """
+        self.accumulator += frame_dt
+        steps = 0
+        # A tiny tolerance stops float drift turning two 1/120 s frames into
+        # anything other than exactly one step.
+        while self.accumulator >= FIXED_DT - 1e-9 and not self.game_over:
+            if steps == MAX_STEPS_PER_FRAME:
+                self.accumulator = 0.0
+                break
+            self.step(FIXED_DT)
+            self.accumulator -= FIXED_DT
+            steps += 1
+        self.accumulator = max(self.accumulator, 0.0)
+        self.store.alpha = min(self.accumulator / FIXED_DT, 1.0)
+        return steps
+
+    def step(self, dt=FIXED_DT):
+        """Advance the session by ``dt`` simulated seconds."""
+        if self.game_over:
+            return
+        timing = self.phase_times
+        if timing is not None:
+            started = time.perf_counter()
+        if self.script:
+            self._run_script()
+        # Zoom decides where traffic spawns and how big halos are, so replays need it
+        if self.input_log is not None and self.zoom != self._logged_zoom:
+            self.input_log.append((self.ticks, "zoom", self.zoom))
+            self._logged_zoom = self.zoom
+        self.time += dt
+        self.ticks += 1
+        self.apply_queued_commands()
+        self.spawn_timer += dt
+        if self.spawn_timer >= self.next_spawn_time and len(self.aircrafts) < self.max_aircraft:
+            self.spawn_aircraft()
+        store = self.store
+        store.update(dt, self.approach_target)
+
+        left, top, width, height = self.world_bounds
+        pos = store.pos[:store.count]
+        outside = ~((pos[:, 0] >= left) & (pos[:, 0] < left + width) & (pos[:, 1] >= top) & (pos[:, 1] < top + height))
+        if outside.any():
+            for ac in [store.owners[i] for i in np.flatnonzero(outside)]:
+                self.remove_aircraft(ac)
+                self.append_message(ac.callsign, f"{ac.callsign} left airspace.")
+
+        if timing is not None:
+            moved = time.perf_counter()
+            timing["update"] += moved - started
+        self.detect_conflicts()
+        self.detect_collisions()
+        if self.ticks % self.stca_interval_ticks == 0:
+            self.detect_stca()
+        if timing is not None:
+            timing["conflict"] += time.perf_counter() - moved
+
+    def _run_script(self):
+        script = self.script
+        while script and script[0][0] <= self.ticks:
+            _, kind, value = script.popleft()
+            if kind == "command":
+                self.process_command(value)
+            elif kind == "zoom":
+                self.zoom = value
+
+    # --- Proximity queries ---
+    def update_broadphase(self):
+        """Rebuild the spatial hash if any aircraft moved, spawned or left since the last build."""
+        store = self.store
+        # Cells must span the widest query: conflict minimum or two halos at this zoom
+        halo_reach = 2 * self.halo_radius() / max(self.zoom, 0.001)
+        cell_size = max(CONFLICT_DISTANCE_NM * PIXELS_PER_NM, halo_reach, self.pick_radius)
+        key = (store.revision, cell_size)
+        if self._broadphase_key != key:
+            self.broadphase.cell_size = cell_size
+            self.broadphase.rebuild(store.pos, store.altitude, store.count)
+            self._broadphase_key = key
+        return self.broadphase
+
+    def _close_pairs(self):
+        """Candidate pairs from the broadphase with their horizontal distance and altitude gap.
+
+        Computed once per broadphase build and shared by the conflict and
+        collision checks.
+        """
+        broadphase = self.update_broadphase()
+        if self._pairs_key != self._broadphase_key:
+            a, b = broadphase.candidate_pairs()
+            pos = self.store.pos
+            altitude = self.store.altitude
+            dx = pos[a, 0] - pos[b, 0]
+            dy = pos[a, 1] - pos[b, 1]
+            self._pairs = (a, b, np.sqrt(dx * dx + dy * dy), np.abs(altitude[a] - altitude[b]))
+            self._pairs_key = self._broadphase_key
+        return self._pairs
+
+    def detect_conflicts(self):
+        """Flag every pair inside 2.5 NM and 1000 ft of each other."""
+        store = self.store
+        conflict = store.conflict
+        conflict[:store.count] = False
+        a, b, dist, alt_diff = self._close_pairs()
+        hit = (dist / PIXELS_PER_NM < CONFLICT_DISTANCE_NM) & (alt_diff < CONFLICT_ALTITUDE_FT)
+        conflict[a[hit]] = True
+        conflict[b[hit]] = True
+        self.any_conflict = bool(hit.any())
+
+    def _altitude_at(self, slots, t):
+        """Predicted altitude of ``slots`` after ``t`` seconds of climbing or descending to target."""
+        store = self.store
+        altitude = store.altitude[slots]
+        reach = store.climb_rate[slots] * t
+        return altitude + np.clip(store.target_altitude[slots] - altitude, -reach, reach)
+
+    def _stca_window(self, x, y, vx, vy, start, end):
+        """Slot pairs ``(a, b, enter)`` that lose separation between ``start`` and ``end`` seconds ahead.
+
+        Two tracks that come within the minima in the window are, halfway
+        through it, no further apart than the minima plus the distance either
+        covers in the window, so the grid buckets those halfway points.
+        """
+        store = self.store
+        n = store.count
+        middle = (start + end) / 2
+        separation = CONFLICT_DISTANCE_NM * PIXELS_PER_NM
+        separation_sq = separation * separation
+        grid = self.stca_broadphase
+        grid.cell_size = separation + float(np.hypot(vx, vy).max()) * (end - start)
+        grid.band_ft = CONFLICT_ALTITUDE_FT + float(store.climb_rate[:n].max()) * (end - start)
+        grid.rebuild(np.column_stack((x + vx * middle, y + vy * middle)), self._altitude_at(np.arange(n), middle), n)
+        a, b = grid.candidate_pairs()
+
+        # Closest approach within the window; pairs that stay outside the
+        # minima horizontally even then are dropped before anything else
+        dx, dy = x[a] - x[b], y[a] - y[b]
+        dvx, dvy = vx[a] - vx[b], vy[a] - vy[b]
+        dv2 = dvx * dvx + dvy * dvy
+        pv = dx * dvx + dy * dvy
+        t_cpa = np.clip(-pv / np.maximum(dv2, 1e-12), start, end)
+        close = (dx + dvx * t_cpa) ** 2 + (dy + dvy * t_cpa) ** 2 < separation_sq
+        a, b, dx, dy, dv2, pv = (v[close] for v in (a, b, dx, dy, dv2, pv))
+
+        # Horizontally inside the minima on [enter, leave]: the roots of |dp + dv t| = separation
+        root = np.sqrt(np.maximum(pv * pv - dv2 * (dx * dx + dy * dy - separation_sq), 0.0))
+        moving = dv2 > 1e-12
+        safe_dv2 = np.where(moving, dv2, 1.0)
+        enter = np.where(moving, np.clip((-pv - root) / safe_dv2, start, end), start)
+        leave = np.where(moving, np.clip((-pv + root) / safe_dv2, start, end), end)
+
+        # Vertical: the gap is piecewise linear, bending where either aircraft
+        # levels off, so its smallest size on the interval is at an end, at a
+        # bend, or zero if it changes sign
+        climb = store.climb_rate
+        level_a = np.abs(store.target_altitude[a] - store.altitude[a]) / climb[a]
+        level_b = np.abs(store.target_altitude[b] - store.altitude[b]) / climb[b]
+        gaps = np.stack([self._altitude_at(a, t) - self._altitude_at(b, t)
+                         for t in (enter, leave, np.clip(level_a, enter, leave), np.clip(level_b, enter, leave))])
+        vertical = (np.abs(gaps).min(axis=0) < CONFLICT_ALTITUDE_FT) | ((gaps.min(axis=0) < 0) & (gaps.max(axis=0) > 0))
+        return a[vertical], b[vertical], enter[vertical]
+
+    def detect_stca(self):
+        """Short-term conflict alert: flag every pair predicted to lose separation within the horizon.
+
+        Tracks are extrapolated in straight lines at current speed, altitudes
+        toward their targets at the climb rate.  The horizon is checked in
+        STCA_WINDOWS consecutive windows, each with its own broadphase, which
+        keeps the grid cells (and so the candidate pairs) small.  For each
+        candidate the interval in which the pair is closer than 2.5 NM is
+        solved in closed form, and the pair is alerted if the altitude gap
+        drops under 1000 ft anywhere in it.  New alerts are announced once.
+        """
+        store = self.store
+        n = store.count
+        store.stca[:n] = False
+        horizon = self.stca_horizon
+        previous = self._stca_keys
+        self.stca_alerts = []
+        self._stca_keys = np.empty(0, dtype=np.int64)
+        if n < 2 or horizon <= 0:
+            return
+        x, y = store.pos[:n, 0], store.pos[:n, 1]
+        speed = store.speed[:n] * PIXELS_PER_SECOND_PER_KNOT
+        vx = store.dir_x[:n] * speed
+        vy = store.dir_y[:n] * speed
+
+        edges = np.linspace(0.0, horizon, STCA_WINDOWS + 1)
+        found = [self._stca_window(x, y, vx, vy, start, end) for start, end in zip(edges[:-1], edges[1:])]
+        a, b, enter = (np.concatenate(column) for column in zip(*found))
+        if a.size == 0:
+            return
+        # A pair alerted in several windows keeps the earliest, which comes first
+        _, first_seen = np.unique(np.minimum(a, b) * n + np.maximum(a, b), return_index=True)
+        a, b, enter = a[first_seen], b[first_seen], enter[first_seen]
+        dx, dy = x[a] - x[b], y[a] - y[b]
+        dvx, dvy = vx[a] - vx[b], vy[a] - vy[b]
+        dv2 = dvx * dvx + dvy * dvy
+        t_cpa = np.clip(-(dx * dvx + dy * dvy) / np.maximum(dv2, 1e-12), 0.0, horizon)
+        miss = np.hypot(dx + dvx * t_cpa, dy + dvy * t_cpa) / PIXELS_PER_NM
+        store.stca[a] = True
+        store.stca[b] = True
+
+        # Name each pair earlier spawn first, soonest alert first, and
+        # announce only the pairs that were not alerted last time
+        owners = np.empty(n, dtype=object)
+        owners[:] = store.owners
+        seq = np.fromiter((ac.seq for ac in store.owners), dtype=np.int64, count=n)
+        order = np.argsort(enter, kind="stable")
+        a, b, enter, miss = a[order], b[order], enter[order], miss[order]
+        first = np.where(seq[a] < seq[b], a, b)
+        second = np.where(seq[a] < seq[b], b, a)
+        self._stca_keys = (seq[first] << 32) + seq[second]
+        self.stca_alerts = list(zip(owners[first], owners[second], enter.tolist(), miss.tolist()))
+        for i in np.flatnonzero(~np.isin(self._stca_keys, previous)):
+            self.append_message("STCA", f"{owners[first[i]].callsign} and {owners[second[i]].callsign} lose "
+                                        f"separation in {enter[i]:.0f} s, closest {miss[i]:.1f} NM")
+
+    def halo_radius(self, ac=None):
+        """Radius in screen pixels of the halo drawn around an aircraft at the current zoom."""
+        pick_radius = ac.base_pick_radius if ac is not None else self.pick_radius
+        return max(10, int(pick_radius * self.zoom * 1.1))
+
+    def detect_collisions(self):
+        """Game over once two halos overlap within 1000 ft of each other."""
+        a, b, dist, alt_diff = self._close_pairs()
+        overlap = dist * self.zoom < 2 * self.halo_radius()
+        if (overlap & (alt_diff < CONFLICT_ALTITUDE_FT)).any():
+            self.game_over = True
+
+    def aircraft_at(self, world_point):
+        """The topmost aircraft whose pick circle contains a world point, or None."""
+        x, y = world_point
+        slots = self.update_broadphase().query_point(x, y)
+        if slots.size == 0:
+            return None
+        pos = self.store.pos[slots]
+        dist_sq = (pos[:, 0] - x) ** 2 + (pos[:, 1] - y) ** 2
+        owners = self.store.owners
+        hits = [owners[slot] for slot in slots[dist_sq <= self.pick_radius * self.pick_radius]]
+        # Later spawns are drawn on top, so they win the click
+        return max(hits, key=lambda ac: ac.seq) if hits else None
+
+    def run(self, duration, dt=FIXED_DT):
+        """Step the session headlessly for ``duration`` simulated seconds."""
+        ticks = int(round(duration / dt))
+        for _ in range(ticks):
+            self.step(dt)
+            if self.game_over:
+                break
+        return ticks
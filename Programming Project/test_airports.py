@@ -0,0 +1,47 @@
+"""Tests for the airport data files and the layouts derived from them."""
+import json
+
+import pytest
+
+import airports
+from simulation import Simulation, airport_layout
+
+
+def test_shipped_airports_load_under_every_name():
+    loaded = airports.load_airports()
+    for name in ("heathrow", "london heathrow", "egll", "glasgow", "los angeles", "lax"):
+        assert name in loaded
+    assert loaded["lax"] is loaded["los angeles"]
+
+
+def test_layout_is_built_once_and_feeds_the_simulation():
+    layout = airport_layout("Heathrow", (640, 416))
+    assert airport_layout("Heathrow", (640, 416)) is layout
+    assert sorted(layout.entry_points) == ["09L", "09R", "27L", "27R"]
+    assert layout.headings["09L"] == 90 and layout.headings["27R"] == 270
+    assert set(layout.fixes) == {"BNN", "LAM", "BIG", "OCK"}
+    sim = Simulation({"Airport": "London Heathrow"})
+    assert sim.runway_entry_points == layout.entry_points
+    assert not airport_layout("Nowhere", (640, 416)).runways
+
+
+@pytest.mark.parametrize("runway, message", [
+    ({"labels": ["09"], "heading": 90, "length": 300, "width": 14}, "labels"),
+    ({"labels": ["09", "27"], "length": 300, "width": 14}, "missing 'heading'"),
+    ({"labels": ["09", "27"], "heading": 360, "length": 300, "width": 14}, "heading must be in"),
+    ({"labels": ["09", "27"], "heading": 90, "length": -1, "width": 14}, "length must be greater"),
+    ({"labels": ["09", "27"], "heading": "east", "length": 300, "width": 14}, "must be a number"),
+])
+def test_invalid_runways_are_rejected(runway, message):
+    with pytest.raises(airports.AirportError, match=message):
+        airports.parse_airport({"name": "Test", "runways": [runway]}, "test.json")
+
+
+def test_duplicate_runways_and_names_are_rejected(tmp_path):
+    runway = {"labels": ["09", "27"], "heading": 90, "length": 300, "width": 14}
+    with pytest.raises(airports.AirportError, match="runway 09, 27 defined twice"):
+        airports.parse_airport({"name": "Test", "runways": [runway, runway]})
+    (tmp_path / "a.json").write_text(json.dumps({"name": "Alpha", "aliases": ["TST"], "runways": [runway]}))
+    (tmp_path / "b.json").write_text(json.dumps({"name": "Bravo", "aliases": ["tst"], "runways": [runway]}))
+    with pytest.raises(airports.AirportError, match="b.json: 'tst' is already used by Alpha"):
+        airports.load_airports(tmp_path)
@@ -0,0 +1,64 @@
+"""Tests for the shared asset manager, run on SDL's dummy video and audio drivers."""
+import os
+import wave
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from assets import AssetManager
+
+pygame.display.init()
+pygame.display.set_mode((64, 64))
+
+
+def write_image(path, size=(8, 4)):
+    surface = pygame.Surface(size)
+    surface.fill((200, 40, 40))
+    pygame.image.save(surface, str(path))
+
+
+def test_images_are_decoded_once_and_shared(tmp_path, monkeypatch):
+    write_image(tmp_path / "background.png")
+    loads = []
+    real_load = pygame.image.load
+    monkeypatch.setattr(pygame.image, "load", lambda path: loads.append(path) or real_load(path))
+    assets = AssetManager(tmp_path)
+    scaled = assets.image("background.png", (16, 8))
+    assert assets.image("background.png", (16, 8)) is scaled
+    assert scaled.get_size() == (16, 8)
+    assert assets.image("background.png").get_size() == (8, 4)
+    assert len(loads) == 1
+    assert scaled.get_bitsize() == pygame.display.get_surface().get_bitsize()
+    assert assets.image(("missing.png", "background.png"), (16, 8)) is scaled
+    assert assets.image("missing.png") is None
+
+
+def test_sounds_and_files_load_in_the_background(tmp_path):
+    with wave.open(str(tmp_path / "beep.wav"), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(22050)
+        f.writeframes(b"\0\0" * 2205)
+    (tmp_path / "map.pdf").write_bytes(b"%PDF-1.4")
+    pygame.mixer.init()
+    try:
+        assets = AssetManager(tmp_path)
+        assets.preload_sounds({"beep": ("beep.ogg", "beep.wav"), "missing": ("missing.wav",)})
+        assets.preload_files({"map": ("map.pdf",), "gone": ("gone.pdf",)})
+        assert assets.file("map") == (tmp_path / "map.pdf").resolve()  # whether or not the lookup finished
+        assets.wait(5)
+        assert isinstance(assets.sound("beep"), pygame.mixer.Sound)
+        assert assets.sound("missing") is None and assets.sound("never asked") is None
+        assert assets.file("gone") is None
+        assets.shutdown()
+    finally:
+        pygame.mixer.quit()
+
+
+def test_sounds_are_skipped_without_audio(tmp_path):
+    assets = AssetManager(tmp_path, audio=False)
+    assets.preload_sounds({"beep": ("beep.wav",)})
+    assets.wait(1)
+    assert assets.sound("beep") is None
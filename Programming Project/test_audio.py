@@ -0,0 +1,61 @@
+"""Tests for the reserved-channel sound cues, run on SDL's dummy audio driver."""
+import os
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from audio import AudioManager, Cue
+
+
+@pytest.fixture
+def mixer():
+    pygame.mixer.init(22050, -16, 1)
+    yield
+    pygame.mixer.quit()
+
+
+def tone(seconds):
+    return pygame.mixer.Sound(buffer=b"\0\0" * int(22050 * seconds))
+
+
+class Clock:
+    now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cues_are_rate_limited_and_not_stacked(mixer):
+    sounds = {"conflict": tone(5), "alert": tone(5), "button": tone(5)}
+    clock = Clock()
+    audio = AudioManager({"conflict": Cue(), "alert": Cue(min_interval=3.0), "button": Cue(channels=2, overlap=True)},
+                         sounds.get, clock=clock)
+    assert [audio.play("conflict") for _ in range(60)].count(True) == 1  # one frame's worth of conflict
+    assert audio.play("alert") and not audio.play("alert")
+    clock.now += 3
+    audio.stop("alert")
+    assert audio.play("alert")
+    assert [audio.play("button") for _ in range(5)] == [True, True, False, False, False]  # two channels
+    channels = [channel for cue in audio.channels.values() for channel in cue]
+    assert len({id(channel) for channel in channels}) == 4
+
+
+def test_volume_is_applied_once_and_off_mutes(mixer):
+    sound = tone(0.1)
+    audio = AudioManager({"button": Cue(overlap=True)}, {"button": sound}.get)
+    audio.set_volume("Low")
+    assert audio.play("button")
+    assert sound.get_volume() == pytest.approx(0.25, abs=0.01)
+    audio.set_volume("High")
+    assert sound.get_volume() == pytest.approx(1.0, abs=0.01)
+    audio.stop("button")
+    audio.set_volume("Off")
+    assert not audio.play("button")
+
+
+def test_missing_sounds_and_disabled_audio_are_skipped():
+    audio = AudioManager({"alert": Cue()}, {}.get, enabled=False)
+    assert not audio.play("alert")
+    audio.set_volume("High")
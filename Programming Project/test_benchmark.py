@@ -0,0 +1,19 @@
+"""Smoke test for the benchmark suite on a tiny configuration."""
+import json
+
+import benchmark
+
+
+def test_benchmark_writes_every_phase_and_compares(tmp_path, capsys):
+    out = tmp_path / "bench.json"
+    args = ["--out", str(out), "--counts", "5", "--airports", "Glasgow", "--zooms", "1.0", "--repeats", "2"]
+    assert benchmark.main(args) == 0
+    report = json.loads(out.read_text())
+    assert report["meta"]["video_driver"] == "dummy"
+    [result] = report["results"]
+    assert (result["airport"], result["zoom"], result["aircraft"]) == ("Glasgow", 1.0, 5)
+    for phase in benchmark.PHASES:
+        assert result[phase]["samples"] >= 2
+        assert result[phase]["median_ms"] >= 0
+    assert benchmark.main(args[2:] + ["--out", str(tmp_path / "again.json"), "--compare", str(out)]) == 0
+    assert "x)" in capsys.readouterr().out
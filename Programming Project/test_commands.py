@@ -0,0 +1,42 @@
+"""Tests for the radio command grammar."""
+import random
+
+from commands import NOT_TRANSMITTED, Command, parse_commands
+from simulation import Simulation
+
+
+def test_partial_and_multi_aircraft_groups():
+    commands, errors = parse_commands("ba123, qr456 fl080 spd 220 LH789 HDG 370")
+    assert errors == []
+    assert commands == [
+        Command("BA123", speed=220, altitude=8000),
+        Command("QR456", speed=220, altitude=8000),
+        Command("LH789", heading=10),
+    ]
+    assert parse_commands("BA123 SPD999")[0] == [Command("BA123", speed=400)]
+
+
+def test_clearances():
+    commands, errors = parse_commands("BA123 CLEARED TO LAND RWY09L; QR456 cleared for takeoff")
+    assert errors == []
+    assert commands == [Command("BA123", clearance="land", runway="09L"), Command("QR456", clearance="takeoff")]
+    assert parse_commands("BA123 CLEARED TO LAND 27R")[0] == [Command("BA123", clearance="land", runway="27R")]
+    assert parse_commands("BA123 CLEARED TO LAND") == ([], ["Landing clearance needs a runway"])
+
+
+def test_bad_batches_are_rejected_alone():
+    commands, errors = parse_commands("BA123 HDG090 XYZ; QR456 FL100; EK1 ; HDG090")
+    assert commands == [Command("QR456", altitude=10000)]
+    assert errors == ["Unknown token XYZ", NOT_TRANSMITTED, "No aircraft called for HDG090"]
+    assert parse_commands("BA123HDG090") == ([], ["Unknown token BA123HDG090"])
+    assert parse_commands("   ") == ([], [NOT_TRANSMITTED])
+
+
+def test_queued_commands_apply_once_per_tick():
+    sim = Simulation({}, rng=random.Random(3), max_aircraft=5000)
+    spawned = [sim.spawn_aircraft() for _ in range(3000)]
+    line = "; ".join(f"{ac.callsign} HDG180 FL050" for ac in spawned)
+    assert sim.process_command(line) == 3000
+    sim.step()
+    assert not sim.command_queue
+    assert all((ac.target_heading, ac.target_altitude) == (180, 5000) for ac in spawned)
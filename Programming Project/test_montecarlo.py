@@ -0,0 +1,48 @@
+"""Tests for the Monte Carlo session runner on short sessions."""
+import math
+import random
+
+import montecarlo
+from simulation import PIXELS_PER_NM, Simulation
+
+
+def test_approach_policy_lands_an_arrival():
+    sim = Simulation({"Airport": "Glasgow"}, rng=random.Random(0), max_aircraft=1)
+    ac = sim.spawn_aircraft()
+    policy = montecarlo.ApproachPolicy()
+    fix = policy._final_fix(sim, "05")
+    store = sim.store
+    store.pos[ac.slot] = (fix[0] - 3 * PIXELS_PER_NM, fix[1] + 2 * PIXELS_PER_NM)
+    store.altitude[ac.slot] = store.target_altitude[ac.slot] = 4000
+    while sim.time < 600 and not sim.landings:
+        policy(sim)
+        sim.step()
+    assert sim.landings == 1 and ac not in sim.aircrafts
+
+
+def test_sessions_are_reproducible():
+    job = {"difficulty": "Realistic", "policy": "approach", "airport": "Heathrow", "duration": 60, "seed": 4}
+    first, second = montecarlo.run_session(job), montecarlo.run_session(job)
+    first.pop("tick_ms")
+    second.pop("tick_ms")
+    assert first == second
+    assert first["simulated_s"] == 60 and first["spawned"] >= 6
+
+
+def test_batch_resumes_and_summarizes(tmp_path):
+    out = tmp_path / "runs.jsonl"
+    jobs = montecarlo.make_jobs(["Easy", "Realistic"], 2, 20, "idle", "Glasgow")
+    assert montecarlo.run_batch(jobs[:3], out, workers=2) == 3
+    with open(out, "a", encoding="utf-8") as f:
+        f.write('{"difficulty": "Easy", "se')  # an interrupted write
+    lines = []
+    assert montecarlo.run_batch(jobs, out, workers=2, log=lines.append) == 1
+    assert lines[0].startswith("3 of 4 sessions already in")
+    results = montecarlo.load_results(out)
+    assert sorted(montecarlo.job_key(r) for r in results) == sorted(montecarlo.job_key(j) for j in jobs)
+    summary = montecarlo.summarize(results)
+    assert [(row["difficulty"], row["sessions"]) for row in summary] == [("Easy", 2), ("Realistic", 2)]
+    for row in summary:
+        assert row["game_over_rate"] == 0 and row["landings_per_hour"] == 0
+        assert math.isfinite(row["tick_ms_mean"]) and row["tick_ms_mean"] > 0
+    assert "Realistic" in montecarlo.format_summary(summary)
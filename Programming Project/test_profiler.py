@@ -0,0 +1,66 @@
+"""Tests for the per-phase frame profiler."""
+import csv
+
+import pytest
+
+from profiler import PHASES, FrameProfiler
+from simulation import Simulation
+
+
+def record_frame(profiler, total, **phases):
+    """Append a frame with the given timings (seconds) without waiting for them."""
+    current = dict.fromkeys(PHASES, 0.0)
+    current.update(phases)
+    profiler.frames.append((total, current))
+
+
+def test_marks_charge_the_time_since_the_previous_mark():
+    profiler = FrameProfiler()
+    profiler.begin_frame()
+    profiler.mark("layers")
+    profiler.current["update"] += 5.0  # timed elsewhere, like the engine does
+    profiler.skip()
+    profiler.mark("flip")
+    profiler.end_frame()
+    total, phases = profiler.frames[-1]
+    assert profiler.frame_count == 1
+    assert phases["update"] == 5.0
+    assert phases["layers"] + phases["flip"] <= total < 1.0
+
+
+def test_statistics_over_kept_frames():
+    profiler = FrameProfiler(history=100)
+    for ms in range(1, 101):
+        record_frame(profiler, ms / 1000, hud=ms / 2000)
+    percentiles = profiler.percentiles()
+    assert percentiles[50] == pytest.approx(51) and percentiles[99] == pytest.approx(100)
+    assert profiler.phase_means()["hud"] == pytest.approx(25.25)
+    histogram = profiler.histogram(bins=10, max_ms=50)
+    assert sum(histogram) == 100 and histogram[-1] == 56
+    record_frame(profiler, 0.001)
+    assert len(profiler.frames) == 100
+
+
+def test_csv_gets_a_row_per_frame(tmp_path):
+    path = tmp_path / "frames.csv"
+    profiler = FrameProfiler()
+    profiler.start_csv(path)
+    assert profiler.recording
+    for _ in range(3):
+        profiler.begin_frame()
+        profiler.mark("hud")
+        profiler.end_frame()
+    profiler.stop_csv()
+    assert not profiler.recording
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["frame", "total_ms"] + [f"{phase}_ms" for phase in PHASES]
+    assert [row[0] for row in rows[1:]] == ["1", "2", "3"]
+
+
+def test_engine_charges_update_and_conflict_time():
+    sim = Simulation({"Airport": "Heathrow"})
+    sim.phase_times = dict.fromkeys(PHASES, 0.0)
+    for _ in range(5):
+        sim.step()
+    assert sim.phase_times["update"] > 0 and sim.phase_times["conflict"] > 0
@@ -0,0 +1,147 @@
+"""Tests for the cached radar drawing layers, run on SDL's dummy video driver."""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import rendering
+
+WINDOW_SIZE = (320, 208)
+
+pygame.display.init()
+pygame.font.init()
+pygame.display.set_mode(WINDOW_SIZE)
+
+
+def test_layer_cache_reuses_and_evicts():
+    built = []
+
+    def build(zoom):
+        built.append(zoom)
+        return pygame.Surface((1, 1))
+
+    cache = rendering.LayerCache(build, max_entries=2)
+    first = cache.get(0.2)
+    assert cache.get(0.2) is first
+    cache.get(0.3)
+    cache.get(0.4)  # evicts 0.2, the least recently used
+    cache.get(0.2)
+    assert built == [0.2, 0.3, 0.4, 0.2]
+    assert len(cache.entries) == 2
+
+
+def test_radar_layer_matches_direct_drawing():
+    layer = rendering.build_radar_layer(0.5, WINDOW_SIZE, 200)
+    expected = pygame.Surface(WINDOW_SIZE)
+    expected.fill(rendering.RADAR_BACKGROUND)
+    overlay = pygame.Surface(WINDOW_SIZE, pygame.SRCALPHA)
+    center = (WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] // 2)
+    for i in range(1, 6):
+        pygame.draw.circle(overlay, rendering.RADAR_LINE_COLOR, center, 100 * i // 5, 2)
+    pygame.draw.line(overlay, rendering.RADAR_LINE_COLOR, (center[0], 60), (center[0], WINDOW_SIZE[1] - 60), 1)
+    pygame.draw.line(overlay, rendering.RADAR_LINE_COLOR, (60, center[1]), (WINDOW_SIZE[0] - 60, center[1]), 1)
+    expected.blit(overlay, (0, 0))
+    for x in range(0, WINDOW_SIZE[0], 3):
+        for y in range(0, WINDOW_SIZE[1], 3):
+            assert layer.get_at((x, y)) == expected.get_at((x, y))
+
+
+def test_airport_layer_is_cached_and_cropped():
+    layer, topleft = rendering.airport_layers.get("Heathrow", 0.2, WINDOW_SIZE)
+    assert rendering.airport_layers.get("Heathrow", 0.2, WINDOW_SIZE)[0] is layer
+    assert rendering.airport_layers.get("Glasgow", 0.2, WINDOW_SIZE)[0] is not layer
+    bounds = pygame.Rect(topleft, layer.get_size())
+    assert pygame.Rect((0, 0), WINDOW_SIZE).contains(bounds)
+    assert bounds.width < WINDOW_SIZE[0] or bounds.height < WINDOW_SIZE[1]
+
+
+def test_unknown_airport_has_an_empty_layer():
+    layer, _ = rendering.build_airport_layer("Nowhere", 1.0, WINDOW_SIZE)
+    assert layer.get_size() == (0, 0)
+
+
+def test_sprite_atlas_quantizes_and_bounds():
+    image = pygame.Surface((20, 10), pygame.SRCALPHA)
+    atlas = rendering.SpriteAtlas(image, step_deg=2, max_entries=3)
+    sprite = atlas.get(90.4, 0.5)
+    assert atlas.get(89.6, 0.5) is sprite
+    assert atlas.get(449.9, 0.5) is sprite  # same heading once wrapped
+    assert sprite.get_size() == (10, 5)  # heading 90 is the unrotated art
+    width, height = atlas.get(0.0, 0.5).get_size()
+    assert width < height  # heading 0 points the art north
+    atlas.get(10.0, 0.5)
+    atlas.get(10.0, 1.0)
+    assert len(atlas.entries) == 3
+    assert atlas.get(90.0, 0.5) is not sprite  # evicted and rebuilt
+
+
+def test_text_cache_counts_hits_and_evicts():
+    font = pygame.font.Font(None, 18)
+    cache = rendering.TextCache(max_entries=2)
+    first = cache.render(font, "BA123", (255, 255, 255))
+    assert cache.render(font, "BA123", [255, 255, 255]) is first
+    assert cache.render(font, "BA123", (255, 0, 0)) is not first
+    cache.render(font, "QR456", (255, 255, 255))
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert len(cache.entries) == 2
+    assert cache.render(font, "BA123", (255, 255, 255)) is not first
+
+
+def test_font_registry_resolves_each_font_once(tmp_path, monkeypatch):
+    default = os.path.join(os.path.dirname(pygame.__file__), pygame.font.get_default_font())
+    (tmp_path / "Radar.ttf").write_bytes(open(default, "rb").read())
+    registry = rendering.FontRegistry(tmp_path)
+
+    def no_system_fonts(*args, **kwargs):
+        raise AssertionError("bundled fonts should not fall back to SysFont")
+
+    monkeypatch.setattr(pygame.font, "SysFont", no_system_fonts)
+    font = registry.get("radar", 18)
+    assert registry.get("Radar", 18) is font
+    bold = registry.get("radar", 18, bold=True)
+    assert bold is not font and bold.get_bold()
+    registry.preload([("radar", 18, False), ("radar", 24, False)])
+    assert len(registry.fonts) == 3
+
+
+def test_message_log_renders_once_fades_and_records_history(tmp_path):
+    font = pygame.font.Font(None, 18)
+    history = tmp_path / "history.log"
+    log = rendering.MessageLog(font, fade_seconds=8.0, max_entries=3, history_path=history)
+    log.append("ATC", "BA123 selected.", now=0.0)
+    line = log.entries[0][1]
+    target = pygame.Surface(WINDOW_SIZE)
+    log.draw(target, (0, 0), now=4.0)
+    assert log.entries[0][1] is line
+    assert line.get_alpha() == 128
+    for i in range(3):
+        log.append("You", f"command {i}", now=5.0)
+    assert len(log.entries) == 3  # the oldest line fell out of the ring
+    log.draw(target, (0, 0), now=13.0)
+    assert not log.entries
+    log.close()
+    lines = history.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 4
+    assert lines[0].endswith("ATC: BA123 selected.")
+
+
+def test_dirty_rects_push_changed_regions_and_fall_back_to_flip(monkeypatch):
+    pushed = []
+    monkeypatch.setattr(pygame.display, "flip", lambda: pushed.append("flip"))
+    monkeypatch.setattr(pygame.display, "update", lambda rects: pushed.append(list(rects)))
+    updates = rendering.DirtyRects(WINDOW_SIZE)
+    updates.add((10, 10, 20, 20))
+    assert updates.present()  # the first frame is always a full flip
+    updates.add((40, 10, 20, 20))
+    updates.add(pygame.Rect(0, 0, 0, 0))  # empty rects are ignored
+    assert not updates.present()
+    # Last frame's region is pushed again so the old image gets erased
+    assert pushed[-1] == [pygame.Rect(10, 10, 20, 20), pygame.Rect(40, 10, 20, 20)]
+    updates.add((310, 200, 50, 50))
+    updates.present()
+    assert pushed[-1] == [pygame.Rect(40, 10, 20, 20), pygame.Rect(310, 200, 10, 8)]
+    updates.invalidate()
+    assert updates.present() and pushed[-1] == "flip"
+    updates.add((0, 0) + WINDOW_SIZE)
+    assert updates.present()  # covering most of the window is cheaper as a flip
@@ -0,0 +1,44 @@
+"""Tests for recording and replaying seeded sessions."""
+import random
+
+import pytest
+
+from scenario import Scenario
+
+
+def record_session(seed):
+    messages = []
+    scenario = Scenario.new({"difficulty": "Realistic"}, seed=seed)
+    sim = scenario.record(on_message=lambda sender, text: messages.append((sender, text)))
+    frames = random.Random(seed)
+    while sim.ticks < 3600 and not sim.game_over:
+        sim.advance(frames.choice([1 / 144, 1 / 60, 1 / 30, 0.25]))
+        if frames.random() < 0.02:
+            sim.zoom = frames.choice([0.2, 0.5, 1.0])
+        if frames.random() < 0.05 and len(sim.aircrafts):
+            ac = frames.choice(list(sim.aircrafts))
+            sim.process_command(f"{ac.callsign} HDG{frames.randint(0, 359):03d} FL{frames.randint(30, 90):03d}")
+    return scenario, sim, messages
+
+
+@pytest.mark.parametrize("name", ["session.json", "session.json.gz"])
+def test_replay_matches_the_recording(tmp_path, name):
+    scenario, sim, messages = record_session(21)
+    assert any(kind == "command" for _, kind, _ in scenario.inputs)
+    assert any(kind == "zoom" for _, kind, _ in scenario.inputs)
+    scenario.save(tmp_path / name)
+
+    replayed_messages = []
+    loaded = Scenario.load(tmp_path / name)
+    replay = loaded.replay(on_message=lambda sender, text: replayed_messages.append((sender, text)))
+    assert replayed_messages == messages
+    assert (replay.ticks, replay.game_over, replay.zoom) == (sim.ticks, sim.game_over, sim.zoom)
+    assert [(ac.callsign, ac.pos, ac.heading_deg) for ac in replay.aircrafts] == \
+        [(ac.callsign, ac.pos, ac.heading_deg) for ac in sim.aircrafts]
+
+
+def test_unknown_versions_are_rejected():
+    data = Scenario(1).to_dict()
+    data["version"] = 99
+    with pytest.raises(ValueError, match="unsupported scenario version"):
+        Scenario.from_dict(data)
@@ -0,0 +1,258 @@
+"""Tests for the headless simulation engine (no pygame needed)."""
+import itertools
+import math
+import random
+
+import numpy as np
+
+import simulation as sim_mod
+from simulation import Simulation, SpatialHash
+
+
+def crowded_simulation(seed, count, zoom=0.2):
+    """A session with ``count`` aircraft packed close together around the airport."""
+    sim = Simulation({}, rng=random.Random(seed), max_aircraft=100000)
+    sim.zoom = zoom
+    for _ in range(count):
+        sim.spawn_aircraft()
+    state = np.random.RandomState(seed)
+    store = sim.store
+    store.pos[:count] = state.uniform(-800, 800, (count, 2)) + 640
+    store.altitude[:count] = state.uniform(3000, 9000, count)
+    store.revision += 1
+    return sim
+
+
+def test_candidate_pairs_cover_every_close_pair_once():
+    state = np.random.RandomState(3)
+    for count in (0, 1, 2, 30, 400):
+        pos = state.uniform(-1500, 1500, (count, 2))
+        altitude = state.uniform(2000, 12000, count)
+        grid = SpatialHash(300, 1000)
+        grid.rebuild(pos, altitude, count)
+        a, b = grid.candidate_pairs()
+        pairs = set(zip(np.minimum(a, b).tolist(), np.maximum(a, b).tolist()))
+        assert len(pairs) == len(a)
+        for i, j in itertools.combinations(range(count), 2):
+            close = math.hypot(*(pos[i] - pos[j])) < 300 and abs(altitude[i] - altitude[j]) < 1000
+            if close:
+                assert (i, j) in pairs
+
+
+def test_detect_conflicts_matches_brute_force():
+    for seed, count, zoom in [(0, 2, 0.2), (1, 50, 1.0), (2, 400, 2.0), (3, 400, 0.5)]:
+        sim = crowded_simulation(seed, count, zoom)
+        sim.detect_conflicts()
+        store = sim.store
+        expected = np.zeros(count, dtype=bool)
+        for i, j in itertools.combinations(range(count), 2):
+            horiz_nm = math.hypot(*(store.pos[i] - store.pos[j])) / sim_mod.PIXELS_PER_NM
+            if horiz_nm < 2.5 and abs(store.altitude[i] - store.altitude[j]) < 1000:
+                expected[i] = expected[j] = True
+        assert (store.conflict[:count] == expected).all()
+        assert sim.any_conflict == expected.any()
+
+
+def test_aircraft_at_picks_topmost_hit():
+    sim = crowded_simulation(4, 300)
+    state = np.random.RandomState(5)
+    for _ in range(50):
+        point = tuple(state.uniform(-800, 800, 2) + 640)
+        hits = [ac for ac in sim.aircrafts
+                if math.hypot(ac.pos[0] - point[0], ac.pos[1] - point[1]) <= sim.pick_radius]
+        expected = hits[-1] if hits else None
+        assert sim.aircraft_at(point) is expected
+
+
+def run_session(seed, duration=600):
+    messages = []
+    sim = Simulation({"difficulty": "Realistic"}, rng=random.Random(seed),
+                     on_message=lambda sender, text: messages.append((sender, text)))
+    sim.run(duration)
+    return sim, messages
+
+
+def test_seeded_run_is_reproducible():
+    sim1, messages1 = run_session(7)
+    sim2, messages2 = run_session(7)
+    assert messages1 == messages2
+    assert sim1.time == sim2.time
+    assert [ac.pos for ac in sim1.aircrafts] == [ac.pos for ac in sim2.aircrafts]
+    assert any("inbound" in text for _, text in messages1)
+
+
+def test_commands_steer_aircraft():
+    messages = []
+    sim = Simulation({}, rng=random.Random(1), on_message=lambda sender, text: messages.append(text))
+    ac = sim.spawn_aircraft()
+    assert sim.process_command(f"{ac.callsign.lower()} HDG090 SPD250 FL080") == 1
+    assert ac.target_heading != 90  # queued until the next tick
+    sim.step()
+    assert messages[-1] == "Turning HDG 090, speed 250 kts, altitude 8000 ft"
+    assert (ac.target_heading, ac.target_speed, ac.target_altitude) == (90, 250, 8000)
+    sim.process_command(f"{ac.callsign} SPD180")
+    sim.step()
+    assert messages[-1] == "Speed 180 kts"
+    assert (ac.target_heading, ac.target_speed, ac.target_altitude) == (90, 180, 8000)
+    sim.process_command(f"{ac.callsign}")
+    assert messages[-1] == "Message not transmitted, please try again."
+    sim.process_command("XX999 HDG090 SPD250 FL080")
+    sim.step()
+    assert messages[-1] == "Unknown aircraft XX999."
+    sim.process_command(f"{ac.callsign} CLEARED FOR TAKEOFF RWY09L")
+    sim.step()
+    assert messages[-1] == f"Takeoff clearance denied: {ac.callsign} is already airborne"
+
+
+def test_aircraft_leaving_airspace_is_removed():
+    messages = []
+    sim = Simulation({}, rng=random.Random(2), on_message=lambda sender, text: messages.append(text), max_aircraft=1)
+    ac = sim.spawn_aircraft()
+    ac.apply_command(heading=(ac.heading_deg + 180) % 360, speed=400)
+    sim.run(600)
+    assert ac not in sim.aircrafts
+    assert f"{ac.callsign} left airspace." in messages
+
+
+def scalar_update(state, dt, target):
+    """The original per-aircraft update maths, for comparison with AircraftStore.update."""
+    heading_diff = (state["target_heading"] - state["heading"] + 540) % 360 - 180
+    max_turn = 2.5 * dt
+    if abs(heading_diff) > max_turn:
+        state["heading"] = (state["heading"] + max_turn * (1 if heading_diff > 0 else -1)) % 360
+    else:
+        state["heading"] = state["target_heading"] % 360
+    for key, rate in (("speed", 3.0), ("altitude", 1500 / 60.0)):
+        diff = state["target_" + key] - state[key]
+        max_change = rate * dt
+        if abs(diff) > max_change:
+            state[key] += max_change * (1 if diff > 0 else -1)
+        else:
+            state[key] = state["target_" + key]
+    rad = math.radians(state["heading"])
+    step = state["speed"] * sim_mod.PIXELS_PER_SECOND_PER_KNOT * dt
+    state["x"] += math.sin(rad) * step
+    state["y"] -= math.cos(rad) * step
+    state["distance"] = math.hypot(target[0] - state["x"], target[1] - state["y"])
+
+
+def test_vectorized_update_matches_scalar_maths():
+    sim = Simulation({}, rng=random.Random(9), max_aircraft=1000)
+    for _ in range(200):
+        sim.spawn_aircraft()
+    rng = random.Random(10)
+    for ac in list(sim.aircrafts)[::2]:
+        ac.apply_command(heading=rng.randint(0, 359), speed=rng.randint(40, 400), altitude=rng.randint(20, 120) * 100)
+    states = [
+        {"x": ac.pos[0], "y": ac.pos[1], "heading": ac.heading_deg, "speed": ac.speed_knots,
+         "altitude": ac.altitude_ft, "target_heading": ac.target_heading, "target_speed": ac.target_speed,
+         "target_altitude": ac.target_altitude}
+        for ac in sim.aircrafts
+    ]
+    for _ in range(3000):
+        sim.store.update(1 / 60, sim.approach_target)
+        for state in states:
+            scalar_update(state, 1 / 60, sim.approach_target)
+    for ac, state in zip(sim.aircrafts, states):
+        assert ac.heading_deg == state["heading"]
+        assert ac.speed_knots == state["speed"]
+        assert ac.altitude_ft == state["altitude"]
+        assert math.isclose(ac.pos[0], state["x"], abs_tol=0.05)
+        assert math.isclose(ac.pos[1], state["y"], abs_tol=0.05)
+        assert math.isclose(ac.distance_to_target, state["distance"], abs_tol=0.1)
+
+
+def test_advance_is_independent_of_frame_rate():
+    sims = []
+    for frame_dt in (1 / 30, 1 / 144, 0.1 * 8):
+        sim = Simulation({"difficulty": "Realistic"}, rng=random.Random(11))
+        while sim.ticks < 1200 and not sim.game_over:
+            sim.advance(min(frame_dt, (1200 - sim.ticks) * sim_mod.FIXED_DT))
+        sims.append(sim)
+    reference = sims[0]
+    for sim in sims[1:]:
+        assert sim.ticks == reference.ticks
+        assert [ac.pos for ac in sim.aircrafts] == [ac.pos for ac in reference.aircrafts]
+
+
+def test_advance_caps_steps_and_interpolates():
+    sim = Simulation({}, rng=random.Random(12))
+    ac = sim.spawn_aircraft()
+    assert sim.advance(100.0) == sim_mod.MAX_STEPS_PER_FRAME
+    assert sim.accumulator == 0.0
+    sim.advance(sim_mod.FIXED_DT * 1.5)
+    assert math.isclose(sim.store.alpha, 0.5)
+    start, end = sim.store.prev_pos[ac.slot], sim.store.pos[ac.slot]
+    assert math.isclose(ac.draw_pos[0], (start[0] + end[0]) / 2)
+    assert math.isclose(ac.draw_pos[1], (start[1] + end[1]) / 2)
+
+
+def test_registry_keeps_callsigns_unique_and_order_stable():
+    sim = Simulation({}, rng=random.Random(13), max_aircraft=100000)
+    spawned = [sim.spawn_aircraft() for _ in range(12000)]
+    callsigns = [ac.callsign for ac in spawned]
+    assert len(set(callsigns)) == len(callsigns)
+    assert any(len(callsign) > 5 for callsign in callsigns)  # three digits ran out
+    for ac in spawned[::3]:
+        sim.remove_aircraft(ac)
+    remaining = [ac for i, ac in enumerate(spawned) if i % 3]
+    assert list(sim.aircrafts) == remaining
+    assert all(sim.store.owners[ac.slot] is ac for ac in remaining)
+    ac = remaining[-1]
+    assert sim.find_aircraft(ac.callsign.lower()) is ac
+    assert ac in sim.aircrafts and spawned[0] not in sim.aircrafts
+    assert sim.find_aircraft(spawned[0].callsign) is None
+
+
+def test_stca_matches_sampled_tracks():
+    for seed, count in [(10, 2), (11, 60), (12, 60)]:
+        sim = crowded_simulation(seed, count)
+        store = sim.store
+        state = np.random.RandomState(seed)
+        store.heading[:count] = state.uniform(0, 360, count)
+        store.dir_x[:count] = np.sin(np.radians(store.heading[:count]))
+        store.dir_y[:count] = -np.cos(np.radians(store.heading[:count]))
+        store.target_altitude[:count] = state.uniform(3000, 9000, count)
+        sim.detect_stca()
+        flagged = {(min(s.slot, o.slot), max(s.slot, o.slot)) for s, o, _, _ in sim.stca_alerts}
+
+        times = np.arange(0, sim.stca_horizon + 1e-9, 0.1)
+        speed = store.speed[:count] * sim_mod.PIXELS_PER_SECOND_PER_KNOT
+        x = store.pos[:count, 0, None] + store.dir_x[:count, None] * speed[:, None] * times
+        y = store.pos[:count, 1, None] + store.dir_y[:count, None] * speed[:, None] * times
+        alt = np.stack([sim._altitude_at(np.arange(count), t) for t in times], axis=1)
+        separation = sim_mod.CONFLICT_DISTANCE_NM * sim_mod.PIXELS_PER_NM
+        for i, j in itertools.combinations(range(count), 2):
+            dist = np.hypot(x[i] - x[j], y[i] - y[j])
+            gap = np.abs(alt[i] - alt[j])
+            if ((dist < 0.99 * separation) & (gap < 990)).any():
+                assert (i, j) in flagged
+            elif (i, j) in flagged:
+                assert ((dist < 1.01 * separation) & (gap < 1010)).any()
+        assert store.stca[:count].sum() == len({slot for pair in flagged for slot in pair})
+
+
+def test_stca_warns_ahead_of_a_head_on_conflict():
+    messages = []
+    sim = Simulation({}, rng=random.Random(1), on_message=lambda sender, text: messages.append((sender, text)))
+    first = sim.spawn_aircraft()
+    second = sim.spawn_aircraft()
+    store = sim.store
+    closing_nm = 2 * 250 * sim_mod.PIXELS_PER_SECOND_PER_KNOT / sim_mod.PIXELS_PER_NM  # NM per second
+    for ac, x, heading in ((first, 0.0, 90.0), (second, 15 * sim_mod.PIXELS_PER_NM, 270.0)):
+        slot = ac.slot
+        store.pos[slot] = (x, 400.0)
+        store.heading[slot] = store.target_heading[slot] = heading
+        store.dir_x[slot], store.dir_y[slot] = (1.0, 0.0) if heading == 90 else (-1.0, 0.0)
+        store.speed[slot] = store.target_speed[slot] = 250
+        store.altitude[slot] = store.target_altitude[slot] = 5000
+    sim.detect_stca()
+    [(a, b, seconds, miss)] = sim.stca_alerts
+    assert {a, b} == {first, second} and first.stca and second.stca and not first.conflict
+    assert abs(seconds - (15 - 2.5) / closing_nm) < 0.01 and miss < 0.01
+    assert messages[-1][0] == "STCA"
+    sim.detect_stca()
+    assert [sender for sender, _ in messages].count("STCA") == 1  # announced once
+    store.target_altitude[second.slot] = 7000  # climbs clear before they meet
+    sim.detect_stca()
+    assert not sim.stca_alerts and not first.stca